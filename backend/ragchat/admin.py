@@ -1,10 +1,17 @@
 from django.contrib import admin
 
-from .models import Document
+from .models import Document, IngestJob
 
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
-    list_display = ("original_name", "uploaded_at")
+    list_display = ("original_name", "uploaded_at", "ingested_at")
     search_fields = ("original_name",)
     ordering = ("-uploaded_at",)
+
+
+@admin.register(IngestJob)
+class IngestJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "created_at", "finished_at")
+    list_filter = ("status",)
+    ordering = ("-created_at",)
@@ -1,7 +1,46 @@
+import logging
+import os
+import sys
+from pathlib import Path
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def _is_server_process() -> bool:
+    """Whether this process serves requests, as opposed to a one-off command.
+
+    ``runserver`` only serves from the child its autoreloader spawns (marked
+    by ``RUN_MAIN``); other management commands never serve.
+    """
+
+    if Path(sys.argv[0]).name not in {"manage.py", "django-admin"}:
+        return True
+    if len(sys.argv) < 2 or sys.argv[1] != "runserver":
+        return False
+    return "--noreload" in sys.argv or os.environ.get("RUN_MAIN") == "true"
 
 
 class RagchatConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ragchat"
     verbose_name = "RAG Chatbot"
+
+    def ready(self) -> None:
+        # Load the FAISS index at startup so the first chat request does not pay
+        # for it; with ``gunicorn --preload`` forked workers share the pages.
+        if not getattr(settings, "RAGCHAT_PRELOAD_ENGINE", False):
+            return
+        if not _is_server_process():
+            return
+        from .chatbot import get_engine
+
+        try:
+            get_engine()
+        except Exception:
+            logger.exception(
+                "Préchargement du moteur de chatbot impossible, il sera initialisé à la première requête"
+            )
@@ -0,0 +1,222 @@
+"""Caches that let the chatbot engine skip repeated OpenAI calls."""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Sequence
+
+import faiss
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class SemanticResponseCache:
+    """LRU cache of chat answers looked up by cosine similarity of the question.
+
+    Entries are partitioned by ``key`` (the chat mode) so that a RAG answer is
+    never served for a direct question and vice versa.
+    """
+
+    def __init__(self, max_entries: int = 512, threshold: float = 0.97) -> None:
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._index: faiss.IndexIDMap2 | None = None
+        self._entries: OrderedDict[int, tuple[str, Any]] = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        query = np.asarray(vector, dtype="float32").reshape(1, -1).copy()
+        faiss.normalize_L2(query)
+        return query
+
+    def get(self, key: str, vector: Sequence[float]) -> Any | None:
+        """Return the cached value closest to ``vector`` above the threshold."""
+
+        query = self._normalize(vector)
+        with self._lock:
+            if self._index is None or not self._entries:
+                return None
+            scores, ids = self._index.search(query, min(4, len(self._entries)))
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id < 0 or score < self.threshold:
+                    break
+                entry_key, value = self._entries[int(entry_id)]
+                if entry_key == key:
+                    self._entries.move_to_end(int(entry_id))
+                    return value
+        return None
+
+    def put(self, key: str, vector: Sequence[float], value: Any) -> None:
+        """Store ``value`` for ``vector``, evicting the least recently used entry."""
+
+        query = self._normalize(vector)
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(query.shape[1]))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(query, np.array([entry_id], dtype="int64"))
+            self._entries[entry_id] = (key, value)
+            while len(self._entries) > self.max_entries:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self._index.remove_ids(np.array([evicted_id], dtype="int64"))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._index is not None:
+                self._index.reset()
+
+
+class PromptCache:
+    """Exact-match cache of LLM answers keyed by SHA-256 of model and prompt.
+
+    Backed by SQLite so answers survive restarts and are shared by every
+    worker process. The prompt already contains the retrieved context, the
+    history and the language instruction, so a hit is always a valid answer.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], max_entries: int = 10_000) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(path), check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS prompt_cache ("
+            " key TEXT PRIMARY KEY, answer TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def _key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, prompt: str) -> str | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT answer FROM prompt_cache WHERE key = ?",
+                (self._key(model, prompt),),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, model: str, prompt: str, answer: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO prompt_cache VALUES (?, ?, ?)",
+                (self._key(model, prompt), answer, time.time()),
+            )
+            self._connection.execute(
+                "DELETE FROM prompt_cache WHERE key NOT IN ("
+                " SELECT key FROM prompt_cache ORDER BY created_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+
+class EmbeddingCache:
+    """Persistent store of document vectors keyed by BLAKE2b of model and text.
+
+    The text is the one sent for embedding, document and section header
+    included, so a hit always returns the vector that text would get.
+    Re-ingesting a file under the same name (a re-upload, the sections an
+    edit left unchanged, a full rebuild) reads its vectors back instead of
+    sending them to OpenAI again; the same boilerplate in another file does
+    not hit.
+    """
+
+    # SQLite caps the number of bound parameters per statement.
+    _LOOKUP_BATCH = 500
+
+    def __init__(
+        self, path: str | os.PathLike[str], model: str, max_entries: int = 100_000
+    ) -> None:
+        self.model = model
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(path), check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache ("
+            " key BLOB PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(
+            f"{self.model}\0{text}".encode("utf-8"), digest_size=16
+        ).digest()
+
+    def get_many(self, texts: Sequence[str]) -> dict[str, list[float]]:
+        """Return the cached vector of every text in ``texts`` that has one."""
+
+        texts_by_key = {self._key(text): text for text in texts}
+        keys = list(texts_by_key)
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), self._LOOKUP_BATCH):
+                batch = keys[start : start + self._LOOKUP_BATCH]
+                rows = self._connection.execute(
+                    "SELECT key, vector FROM embedding_cache"
+                    f" WHERE key IN ({', '.join('?' * len(batch))})",
+                    batch,
+                )
+                for key, vector in rows:
+                    found[texts_by_key[key]] = np.frombuffer(vector, dtype="float32").tolist()
+        return found
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        now = time.time()
+        rows = [
+            (self._key(text), np.asarray(vector, dtype="float32").tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embedding_cache VALUES (?, ?, ?)", rows
+            )
+            self._connection.execute(
+                "DELETE FROM embedding_cache WHERE key NOT IN ("
+                " SELECT key FROM embedding_cache ORDER BY created_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._connection.execute("COMMIT")
+
+
+class QueryCachingEmbeddings(Embeddings):
+    """Embeddings wrapper memoising ``embed_query`` in a bounded LRU.
+
+    Users often re-send or repeat a question within a session; with this
+    wrapper those turns skip the embedding round-trip.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_entries: int = 1024) -> None:
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self._queries: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        with self._lock:
+            if text in self._queries:
+                self._queries.move_to_end(text)
+                return self._queries[text]
+        vector = self.embeddings.embed_query(text)
+        with self._lock:
+            self._queries[text] = vector
+            while len(self._queries) > self.max_entries:
+                self._queries.popitem(last=False)
+        return vector
@@ -2,14 +2,36 @@
 from __future__ import annotations
 
 
+import asyncio
+import concurrent.futures as cf
+import contextlib
+import functools
+import hashlib
+import itertools
+import json
 import logging
+import multiprocessing
 import os
+import pickle
 import shutil
+import tempfile
+import threading
+import weakref
 from pathlib import Path
-from typing import Iterable, List
+from typing import Callable, Iterable, Iterator, List, NamedTuple
 
 
+try:  # Unix only; elsewhere index writes are serialised within one process.
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 
+import faiss
+import httpx
+import numpy as np
+import openai
+import tiktoken
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain_community.document_loaders import (
     CSVLoader,
@@ -22,20 +44,203 @@ from langchain_community.document_loaders import (
     UnstructuredXMLLoader,
 )
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-
+from langchain_core.document_loaders import BaseLoader
 from langchain_core.documents import Document
-from langchain_core.messages import AIMessage
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import OpenAIEmbeddings
 
 from langdetect import DetectorFactory, LangDetectException, detect
+from tqdm import tqdm
 
+from .cache import (
+    EmbeddingCache,
+    PromptCache,
+    QueryCachingEmbeddings,
+    SemanticResponseCache,
+)
+from .indexes import (
+    LOSSLESS_INDEXES,
+    MMAP_READ_FLAGS,
+    convert_index,
+    create_index,
+    is_file_backed,
+    needs_training,
+)
+from .splitters import SplitThenMergeTextSplitter
 
 
 logger = logging.getLogger(__name__)
 
 DetectorFactory.seed = 0
 
+# Limits of a single OpenAI embedding request: 2048 inputs and ~300k tokens.
+# Batches stop at 250k tokens to leave headroom. They are dispatched
+# concurrently, so ingestion costs one round-trip instead of one per batch.
+EMBEDDING_BATCH_SIZE = 2048
+EMBEDDING_BATCH_MAX_TOKENS = 250_000
+# Medium ingestions are spread over this many parallel requests (never below
+# EMBEDDING_MIN_BATCH_SIZE inputs each) so their round-trips overlap.
+EMBEDDING_PARALLEL_REQUESTS = 8
+EMBEDDING_MIN_BATCH_SIZE = 512
+# Upper bound on embedding requests in flight at once, across all pipeline
+# batches of an ingestion, to stay under the OpenAI rate limits.
+EMBEDDING_MAX_CONCURRENCY = 20
+# The first index build can go through the OpenAI Batch API: half the price,
+# but results may take up to 24 hours, during which the build (and so
+# get_engine) waits; a restarted process resumes the jobs already submitted.
+# Run that build from a one-off process rather than a serving worker.
+# Interactive ingestion never uses it.
+EMBEDDING_BATCH_API = os.getenv("RAG_EMBEDDING_BATCH_API", "False") == "True"
+EMBEDDING_BATCH_POLL_SECONDS = 60
+# OpenAI accepts at most 50,000 embedding inputs in one Batch API job.
+EMBEDDING_BATCH_JOB_MAX_INPUTS = 50_000
+
+# Loaders are I/O bound or parse in native code, so threads overlap well
+# when a handful of files is ingested.
+LOADER_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+# Full-folder loads (bootstrap and rebuild) parse PDFs and Unstructured
+# documents in pure Python, so they run on processes to use every core.
+LOADER_MAX_PROCESSES = os.cpu_count() or 1
+
+# Chunks are sent for embedding in groups of this size while other files are
+# still being parsed.
+PIPELINE_BATCH_SIZE = 256
+
+# Number of chunks retrieved for each RAG question.
+RETRIEVER_K = 4
+# Up to this many vectors, a BLAS matrix-vector product over an in-memory
+# copy beats the FAISS search call and its Python glue.
+DENSE_SEARCH_MAX_VECTORS = 5_000
+
+# Prompt bounds so the cost of a turn does not grow with the conversation.
+# The context budget fits RETRIEVER_K merged chunks of the splitter.
+MAX_HISTORY_ENTRIES = 8
+MAX_CONTEXT_TOKENS = 4_600
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_http_client() -> httpx.Client:
+    """HTTP/2 client with a keep-alive pool shared by every OpenAI call.
+
+    Reusing connections avoids a TCP + TLS handshake per request, and it
+    survives engine rebuilds triggered by an API key change.
+    """
+
+    return httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=60.0,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_async_http_client() -> httpx.AsyncClient:
+    """Async counterpart of :func:`_shared_http_client`, used on :func:`_async_loop`."""
+
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=60.0,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _async_loop() -> asyncio.AbstractEventLoop:
+    """Event loop on a daemon thread that runs every async OpenAI call.
+
+    Pooled async connections belong to the loop that opened them, so the
+    shared client only stays reusable if all coroutines run on one loop
+    rather than on a fresh ``asyncio.run`` each time.
+    """
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="ragchat-async", daemon=True).start()
+    return loop
+
+
+def _run_async(coroutine):
+    """Run ``coroutine`` on :func:`_async_loop` and wait for its result."""
+
+    return asyncio.run_coroutine_threadsafe(coroutine, _async_loop()).result()
+
+
+@functools.lru_cache(maxsize=None)
+def _embedding_encoding() -> tiktoken.Encoding:
+    # Tokenizer shared by every OpenAI embedding model (ada-002, 3-small/large).
+    return tiktoken.get_encoding("cl100k_base")
+
+
+@functools.lru_cache(maxsize=None)
+def _gpu_available() -> bool:
+    get_num_gpus = getattr(faiss, "get_num_gpus", None)
+    return get_num_gpus is not None and get_num_gpus() > 0
+
+
+class _ChatPlan(NamedTuple):
+    """Outcome of retrieval for one message: a ready answer or a prompt to send."""
+
+    intent: str
+    sources: list[str]
+    prompt: str | None = None
+    answer: str | None = None
+    cache_key: str = ""
+    cache_vector: list[float] | None = None
+
+
+class _MarkdownLoader(BaseLoader):
+    """Load Markdown with Unstructured, falling back to plain text on failure."""
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+
+    def lazy_load(self) -> Iterator[Document]:
+        try:
+            documents = UnstructuredMarkdownLoader(self.file_path).load()
+        except Exception:
+            logger.warning(
+                "Échec du chargement Markdown de %s, lecture en texte brut",
+                self.file_path,
+                exc_info=True,
+            )
+            documents = TextLoader(self.file_path).load()
+        yield from documents
+
+
+# Supported file suffixes mapped to the loader building their documents.
+_LOADERS: dict[str, Callable[[str], BaseLoader]] = {
+    ".pdf": PyPDFLoader,
+    ".txt": TextLoader,
+    ".docx": Docx2txtLoader,
+    ".md": _MarkdownLoader,
+    ".html": UnstructuredHTMLLoader,
+    ".htm": UnstructuredHTMLLoader,
+    ".xml": UnstructuredXMLLoader,
+    ".json": lambda path: JSONLoader(path, jq_schema=".", text_content=False),
+    ".csv": lambda path: CSVLoader(file_path=path),
+}
+
+
+def _load_documents(path: Path) -> list[Document]:
+    """Load ``path`` with the loader of its suffix; module level so it pickles."""
+
+    loader_factory = _LOADERS.get(path.suffix.lower())
+    if loader_factory is None:
+        return []
+    try:
+        documents = loader_factory(str(path)).load()
+    except Exception as exc:
+        # Missing, unreadable or undecodable files: no traceback needed.
+        # TextLoader wraps these errors in a RuntimeError.
+        cause = exc.__cause__ if isinstance(exc, RuntimeError) else exc
+        if isinstance(cause, (OSError, ValueError)):
+            logger.warning("Impossible de lire %s : %s", path, cause)
+        else:
+            logger.exception("Erreur inattendue lors du chargement de %s", path)
+        return []
+
+    for doc in documents:
+        doc.metadata.setdefault("source", str(path))
+    return documents
+
 
 class ChatbotEngine:
     """Encapsulates the RAG pipeline and exposes chat/upload helpers."""
@@ -45,22 +250,45 @@ class ChatbotEngine:
         docs_path: str | os.PathLike[str] = "docs",
         index_path: str | os.PathLike[str] = "faiss_index",
         llm_name: str = os.getenv("OPENAI_CHAT_MODEL", "gpt-3.5-turbo"),
+        index_type: str = os.getenv("RAG_FAISS_INDEX", "ivfpq_fastscan"),
     ) -> None:
         self.docs_path = Path(docs_path)
         self.index_path = Path(index_path)
         self.llm_name = llm_name
+        self.index_type = index_type
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise RuntimeError("OPENAI_API_KEY must be provided in the environment.")
 
-        self.model = ChatOpenAI(api_key=self.api_key, model=self.llm_name)
-        self.embedding = OpenAIEmbeddings(api_key=self.api_key)
-
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000, chunk_overlap=200
-        )
+        self._response_cache = SemanticResponseCache()
+        self.text_splitter = SplitThenMergeTextSplitter()
 
         self._vector_store: FAISS | None = None
+        # GPU copy of the index used for searches; the CPU index stays the
+        # source of truth for writes and persistence.
+        self._gpu_resources = None
+        self._gpu_index = None
+        # Normalised copy of the vectors of small indexes, searched with numpy.
+        self._dense_matrix: np.ndarray | None = None
+        self._index_mmapped = False
+        # Modification time of the index file this process has loaded or
+        # written, used to pick up saves made by other worker processes.
+        self._index_mtime_ns: int | None = None
+        # Type the active index was built as; None for indexes saved before
+        # the type was recorded.
+        self._index_kind: str | None = None
+        # Serialises index mutations with searches; ingestion runs on a
+        # background thread while chat requests keep reading the index.
+        self._index_lock = threading.RLock()
+        # Nesting depth of :meth:`_write_lock` in the thread holding it.
+        self._write_lock_depth = 0
+        # SHA-256 of every file already embedded, keyed by path.
+        self._manifest: dict[str, str] = {}
+        # asyncio semaphores are bound to the loop they first run on; callers
+        # of the public async methods may bring their own loop.
+        self._embedding_semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
         logger.info(
             "Initialisation du moteur de chatbot avec les dossiers docs=%s, index=%s et modèle=%s",
             self.docs_path,
@@ -89,34 +317,411 @@ class ChatbotEngine:
             "zh-tw": "chinois traditionnel",
         }
 
+    # ------------------------------------------------------------------
+    # OpenAI clients, built on first use
+    # ------------------------------------------------------------------
+    # Chat completions go straight to the OpenAI SDK: the prompt is a plain
+    # string, so LangChain's message conversion and callbacks add nothing.
+    @functools.cached_property
+    def client(self) -> openai.OpenAI:
+        return openai.OpenAI(api_key=self.api_key, http_client=_shared_http_client())
+
+    @functools.cached_property
+    def async_client(self) -> openai.AsyncOpenAI:
+        return openai.AsyncOpenAI(
+            api_key=self.api_key, http_client=_shared_async_http_client()
+        )
+
+    @functools.cached_property
+    def _prompt_encoding(self) -> tiktoken.Encoding:
+        try:
+            return tiktoken.encoding_for_model(self.llm_name)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+
+    @functools.cached_property
+    def embedding(self) -> QueryCachingEmbeddings:
+        return QueryCachingEmbeddings(
+            OpenAIEmbeddings(
+                api_key=self.api_key,
+                chunk_size=EMBEDDING_BATCH_SIZE,
+                http_client=_shared_http_client(),
+                http_async_client=_shared_async_http_client(),
+            )
+        )
+
+    # SQLite caches live beside the index directory, which rebuilds delete.
+    @functools.cached_property
+    def _prompt_cache(self) -> PromptCache:
+        return PromptCache(self.index_path.with_name("prompt_cache.sqlite3"))
+
+    @functools.cached_property
+    def _embedding_cache(self) -> EmbeddingCache:
+        return EmbeddingCache(
+            self.index_path.with_name("embedding_cache.sqlite3"),
+            model=self.embedding.embeddings.model,
+        )
+
+    # Built lazily and dropped in forked children, which must not reuse the
+    # parent's sockets, SQLite connections or event loop.
+    _FORK_UNSAFE_ATTRIBUTES = (
+        "client",
+        "async_client",
+        "embedding",
+        "_prompt_cache",
+        "_embedding_cache",
+    )
+
+    def _after_fork(self) -> None:
+        for name in self._FORK_UNSAFE_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+        self._embedding_semaphores = weakref.WeakKeyDictionary()
+        if self._vector_store is not None:
+            self._vector_store.embedding_function = self.embedding
+
     # ------------------------------------------------------------------
     # Index bootstrap helpers
     # ------------------------------------------------------------------
     def _load_or_create_index(self) -> None:
-        if self.index_path.exists():
-            logger.info("Chargement de l'index FAISS existant depuis %s", self.index_path)
-            self._vector_store = FAISS.load_local(
-                str(self.index_path),
-                self.embedding,
-                allow_dangerous_deserialization=True,
+        # The write lock loads the index already on disk, if any. Building a
+        # new one under it stops workers started together from each paying
+        # for the embeddings.
+        with self._write_lock():
+            loaded = self._vector_store is not None
+            if loaded:
+                if self._index_kind != self.index_type or needs_training(
+                    self.index_type, self._vector_store.index
+                ):
+                    self._convert_index()
+            else:
+                self._create_index()
+        if not loaded:
+            return
+        # Workers started together share the folder: one of them applies its
+        # changes. A failed sync (API outage, unreadable file) leaves the
+        # index on disk serving until the next start.
+        try:
+            with self._sync_lock() as acquired:
+                if acquired:
+                    self._sync_docs_folder()
+                else:
+                    logger.info(
+                        "Synchronisation du dossier %s déjà en cours dans un autre processus",
+                        self.docs_path,
+                    )
+        except Exception:
+            logger.exception(
+                "Échec de la synchronisation du dossier %s ; l'index existant reste utilisé",
+                self.docs_path,
+            )
+
+    def _create_index(self) -> None:
+        logger.info(
+            "Aucun index existant trouvé. Chargement des documents pour créer un nouvel index."
+        )
+        documents = self._load_all_documents(self.docs_path)
+        if documents:
+            split_docs = self._split_documents(documents)
+            self._set_vector_store(
+                self._build_vector_store(split_docs, offline=EMBEDDING_BATCH_API)
+            )
+            self._save_vector_store()
+            self._write_manifest(
+                {
+                    str(path): self._file_digest(path)
+                    for path in self._list_files(self.docs_path)
+                }
             )
-        else:
             logger.info(
-                "Aucun index existant trouvé. Chargement des documents pour créer un nouvel index."
-            )
-            documents = self._load_all_documents(self.docs_path)
-            if documents:
-                split_docs = self.text_splitter.split_documents(documents)
-                self._vector_store = FAISS.from_documents(split_docs, self.embedding)
-                self.index_path.mkdir(parents=True, exist_ok=True)
-                self._vector_store.save_local(str(self.index_path))
+                "Index FAISS initialisé avec %s documents et sauvegardé dans %s",
+                len(split_docs),
+                self.index_path,
+            )
+        else:
+            self._set_vector_store(None)
+
+    def _set_vector_store(self, vector_store: FAISS | None) -> None:
+        """Swap the active store and refresh the state derived from it.
+
+        Stores are assumed to use the configured index type; loaders
+        overwrite ``_index_kind`` with the type recorded on disk.
+        """
+
+        self._vector_store = vector_store
+        self._index_kind = self.index_type if vector_store is not None else None
+        self._on_index_changed()
+
+    def _on_index_changed(self) -> None:
+        """Drop cached answers and rebuild the search copies of the index."""
+
+        self._response_cache.clear()
+        self._gpu_index = None
+        self._dense_matrix = None
+        if self._vector_store is None:
+            return
+        index = self._vector_store.index
+        if 0 < index.ntotal <= DENSE_SEARCH_MAX_VECTORS and isinstance(
+            faiss.downcast_index(index), LOSSLESS_INDEXES
+        ):
+            matrix = index.reconstruct_n(0, index.ntotal)
+            faiss.normalize_L2(matrix)
+            self._dense_matrix = matrix
+            return
+        if not _gpu_available():
+            return
+        try:
+            if self._gpu_resources is None:
+                self._gpu_resources = faiss.StandardGpuResources()
+            self._gpu_index = faiss.index_cpu_to_gpu(
+                self._gpu_resources, 0, self._vector_store.index
+            )
+        except RuntimeError:
+            logger.warning(
+                "Index %s non transférable sur GPU, recherche sur CPU",
+                type(self._vector_store.index).__name__,
+                exc_info=True,
+            )
+
+    def _read_vector_store(self) -> FAISS:
+        """Load the persisted index, memory-mapped where faiss supports it.
+
+        A mapped file is shared between workers through the OS page cache
+        instead of being copied into each process. Which index types faiss
+        can map is decided by :func:`~ragchat.indexes.is_file_backed`; the
+        others are read into RAM as usual.
+        """
+
+        index_file = str(self.index_path / "index.faiss")
+        self._index_mtime_ns = os.stat(index_file).st_mtime_ns
+        try:
+            index = faiss.read_index(index_file, MMAP_READ_FLAGS)
+            self._index_mmapped = is_file_backed(index)
+        except RuntimeError:
+            logger.warning(
+                "Impossible de projeter l'index FAISS en mémoire (mmap). Chargement complet de %s",
+                index_file,
+            )
+            index = faiss.read_index(index_file)
+            self._index_mmapped = False
+
+        with (self.index_path / "index.pkl").open("rb") as handle:
+            docstore, index_to_docstore_id = pickle.load(handle)
+        return FAISS(
+            embedding_function=self.embedding,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+        )
+
+    def _save_vector_store(self) -> None:
+        """Write the raw index with ``faiss.write_index`` and pickle the docstore.
+
+        This is the layout ``FAISS.save_local`` produces, written directly so
+        the index file can be memory-mapped back by :meth:`_read_vector_store`.
+        Both files are written aside and renamed into place: processes that
+        still map the old index keep reading its inode, and the index file is
+        swapped last so :meth:`_reload_if_stale` always finds a matching
+        docstore.
+        """
+
+        self.index_path.mkdir(parents=True, exist_ok=True)
+        index_file = self.index_path / "index.faiss"
+        docstore_file = self.index_path / "index.pkl"
+        index_temporary = self._temporary_path()
+        faiss.write_index(self._vector_store.index, str(index_temporary))
+        docstore_temporary = self._temporary_path()
+        with docstore_temporary.open("wb") as handle:
+            pickle.dump(
+                (self._vector_store.docstore, self._vector_store.index_to_docstore_id),
+                handle,
+            )
+        os.replace(docstore_temporary, docstore_file)
+        if self._index_kind is not None:
+            (self.index_path / "index_type").write_text(self._index_kind, encoding="utf-8")
+        os.replace(index_temporary, index_file)
+        self._index_mtime_ns = os.stat(index_file).st_mtime_ns
+
+    def _temporary_path(self) -> Path:
+        """Return a fresh file in the index directory to write before renaming."""
+
+        descriptor, name = tempfile.mkstemp(dir=self.index_path, suffix=".tmp")
+        os.close(descriptor)
+        return Path(name)
+
+    def _reload_if_stale(self) -> None:
+        """Reload the index when another worker process has saved a newer one."""
+
+        try:
+            mtime_ns = os.stat(self.index_path / "index.faiss").st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns == self._index_mtime_ns:
+            return
+        with self._index_lock:
+            if mtime_ns == self._index_mtime_ns:
+                return
+            if mtime_ns is None:
+                # Another process rebuilt the index from an empty folder.
                 logger.info(
-                    "Index FAISS initialisé avec %s documents et sauvegardé dans %s",
-                    len(split_docs),
-                    self.index_path,
+                    "Index FAISS supprimé par un autre processus dans %s", self.index_path
                 )
+                self._set_vector_store(None)
+                self._index_mmapped = False
+                self._manifest = {}
+                self._index_mtime_ns = None
+                return
+            if self._index_mtime_ns is None:
+                logger.info("Chargement de l'index FAISS existant depuis %s", self.index_path)
             else:
-                self._vector_store = None
+                logger.info(
+                    "Index FAISS modifié par un autre processus, rechargement depuis %s",
+                    self.index_path,
+                )
+            self._set_vector_store(self._read_vector_store())
+            self._index_kind = self._read_index_kind()
+            self._manifest = self._read_manifest()
+
+    @contextlib.contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Hold the index for a read-modify-write, across worker processes too.
+
+        Inside the block the index and manifest are the latest ones saved by
+        any process. Nested uses in the same thread reuse the outer file lock,
+        which a second ``flock`` on a new descriptor would deadlock against.
+        """
+
+        with self._index_lock:
+            handle = None
+            if self._write_lock_depth == 0 and fcntl is not None:
+                lock_file = self.index_path.with_name(f"{self.index_path.name}.lock")
+                lock_file.parent.mkdir(parents=True, exist_ok=True)
+                handle = lock_file.open("a")
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            self._write_lock_depth += 1
+            try:
+                self._reload_if_stale()
+                self._manifest = self._read_manifest()
+                yield
+            finally:
+                self._write_lock_depth -= 1
+                if handle is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                    handle.close()
+
+    @contextlib.contextmanager
+    def _sync_lock(self) -> Iterator[bool]:
+        """Try to take the folder sync lock; yields whether it was acquired."""
+
+        if fcntl is None:
+            yield True
+            return
+        lock_file = self.index_path.with_name(f"{self.index_path.name}.sync.lock")
+        with lock_file.open("a") as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _sync_docs_folder(self) -> None:
+        """Apply changes made to ``docs_path`` while the server was stopped.
+
+        New and modified files are embedded (unchanged ones are skipped by
+        their SHA-256) and files deleted from the folder leave the index.
+        """
+
+        files = self._list_files(self.docs_path)
+        with self._write_lock():
+            if not self._manifest_path.exists():
+                # Index saved before manifests existed: it was built from the
+                # folder as it is, so adopt the current digests as the baseline.
+                self._write_manifest(
+                    {str(path): self._file_digest(path) for path in files}
+                )
+                return
+
+        removed = [
+            Path(path)
+            for path in self._manifest
+            if Path(path).parent == self.docs_path and not Path(path).exists()
+        ]
+        if removed:
+            logger.info(
+                "Fichiers retirés du dossier %s depuis le dernier démarrage : %s",
+                self.docs_path,
+                [str(path) for path in removed],
+            )
+            if not self.remove_files(removed):
+                logger.info(
+                    "L'index actuel ne permet pas de retirer %s : reconstruction complète",
+                    [str(path) for path in removed],
+                )
+                self._rebuild_indexed_files()
+        if files:
+            self.ingest_files(files)
+
+    def _read_index_kind(self) -> str | None:
+        try:
+            return (self.index_path / "index_type").read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+
+    def _convert_index(self) -> None:
+        """Re-index the loaded vectors as the configured type, without re-embedding."""
+
+        converted = convert_index(self.index_type, self._vector_store.index)
+        if converted is None:
+            logger.warning(
+                "L'index %s ne peut pas être converti en %s sans recalculer les "
+                "embeddings ; reconstruisez l'index pour changer de type",
+                type(self._vector_store.index).__name__,
+                self.index_type,
+            )
+            return
+        logger.info(
+            "Conversion de l'index FAISS %s en %s",
+            type(self._vector_store.index).__name__,
+            self.index_type,
+        )
+        with self._write_lock():
+            self._vector_store.index = converted
+            self._index_mmapped = False
+            self._index_kind = self.index_type
+            self._on_index_changed()
+            self._save_vector_store()
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.index_path / "manifest.json"
+
+    def _read_manifest(self) -> dict[str, str]:
+        try:
+            with self._manifest_path.open(encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest: dict[str, str]) -> None:
+        """Persist ``manifest`` atomically next to the index files."""
+
+        self._manifest = manifest
+        self.index_path.mkdir(parents=True, exist_ok=True)
+        temporary_path = self._temporary_path()
+        with temporary_path.open("w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=2, sort_keys=True)
+        os.replace(temporary_path, self._manifest_path)
+
+    @staticmethod
+    def _file_digest(path: Path) -> str:
+        digest = hashlib.sha256()
+        with path.open("rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
 
     # ------------------------------------------------------------------
     # Document ingestion
@@ -124,38 +729,181 @@ class ChatbotEngine:
     def ingest_files(self, paths: Iterable[Path]) -> List[str]:
         """Load files from disk, update the FAISS index and return their sources."""
 
-        loaded_documents: list[Document] = []
-        ingested_sources: set[str] = set()
+        return _run_async(self.aingest_files(paths))
+
+    async def aingest_files(self, paths: Iterable[Path]) -> List[str]:
+        """Async variant of :meth:`ingest_files` embedding all batches concurrently."""
+
+        existing_paths: list[Path] = []
         for path in paths:
-            logger.info("Ingestion du fichier %s", path)
-            documents = self._load_documents_from_path(path)
-            if not documents:
-                logger.warning("Aucun document chargé depuis %s", path)
-                continue
-            split_docs = self.text_splitter.split_documents(documents)
-            loaded_documents.extend(split_docs)
-            ingested_sources.update(
-                {doc.metadata.get("source", str(path)) for doc in documents}
+            if path.exists():
+                existing_paths.append(path)
+            else:
+                logger.warning("Fichier introuvable, ingestion ignorée : %s", path)
+        paths = existing_paths
+        # Pre-filter against the latest saved state; the files are checked
+        # again under the write lock, since another process may ingest them
+        # while these are being embedded. Index reads, the lock and saves
+        # run on worker threads: this loop also serves chat embeddings.
+        manifest = await asyncio.to_thread(self._read_latest_manifest)
+
+        loop = asyncio.get_running_loop()
+        with cf.ThreadPoolExecutor(
+            max_workers=max(1, min(LOADER_MAX_WORKERS, len(paths)))
+        ) as executor:
+            file_digests = await asyncio.gather(
+                *(loop.run_in_executor(executor, self._file_digest, path) for path in paths)
             )
 
-        if not loaded_documents:
-            logger.warning("Aucun document ingéré. L'index n'a pas été mis à jour.")
+            to_load: dict[str, str] = {}
+            duplicates: dict[str, str] = {}
+            known_digests = set(manifest.values())
+            for path, digest in zip(paths, file_digests):
+                if manifest.get(str(path)) == digest:
+                    logger.info("Fichier %s inchangé depuis sa dernière ingestion", path)
+                    continue
+                if digest in known_digests:
+                    logger.info("Contenu de %s déjà indexé sous un autre fichier", path)
+                    duplicates[str(path)] = digest
+                    continue
+                to_load[str(path)] = digest
+                known_digests.add(digest)
+
+            # Producer/consumer: files are parsed on the thread pool and their
+            # chunks are sent for embedding as soon as a batch is full, so
+            # parsing and network round-trips overlap.
+            load_futures = [
+                loop.run_in_executor(executor, self._load_and_split, Path(path))
+                for path in to_load
+            ]
+            # Chunks travel with the path of the file they come from.
+            embedding_batches: list[tuple[list[tuple[str, Document]], asyncio.Task]] = []
+            pending: list[tuple[str, Document]] = []
+            digests: dict[str, str] = {}
+
+            def dispatch(batch: list[tuple[str, Document]]) -> None:
+                task = asyncio.ensure_future(
+                    self._aembed_texts([doc.page_content for _, doc in batch])
+                )
+                embedding_batches.append((batch, task))
+
+            for future in asyncio.as_completed(load_futures):
+                path, split_docs = await future
+                if not split_docs:
+                    logger.warning("Aucun document chargé depuis %s", path)
+                    continue
+                digests[str(path)] = to_load[str(path)]
+                pending.extend((str(path), doc) for doc in split_docs)
+                while len(pending) >= PIPELINE_BATCH_SIZE:
+                    dispatch(pending[:PIPELINE_BATCH_SIZE])
+                    pending = pending[PIPELINE_BATCH_SIZE:]
+            if pending:
+                dispatch(pending)
+
+        if not embedding_batches:
+            if duplicates:
+                await asyncio.to_thread(self._commit_ingestion, [], [], {}, duplicates)
+            if to_load:
+                logger.warning("Aucun document ingéré. L'index n'a pas été mis à jour.")
+            else:
+                logger.info("Aucun fichier nouveau ou modifié. L'index est à jour.")
             return []
 
-        if self._vector_store is None:
-            self._vector_store = FAISS.from_documents(loaded_documents, self.embedding)
-            logger.info(
-                "Création d'un nouvel index FAISS avec %s fragments de documents", len(loaded_documents)
-            )
-        else:
-            self._vector_store.add_documents(loaded_documents)
+        loaded: list[tuple[str, Document]] = []
+        loaded_vectors: list[list[float]] = []
+        for batch, task in embedding_batches:
+            loaded.extend(batch)
+            loaded_vectors.extend(await task)
+        return await asyncio.to_thread(
+            self._commit_ingestion, loaded, loaded_vectors, digests, duplicates
+        )
+
+    def _read_latest_manifest(self) -> dict[str, str]:
+        self._reload_if_stale()
+        return self._read_manifest()
+
+    def _commit_ingestion(
+        self,
+        loaded: list[tuple[str, Document]],
+        loaded_vectors: list[list[float]],
+        digests: dict[str, str],
+        duplicates: dict[str, str],
+    ) -> List[str]:
+        """Add the embedded chunks of ``digests`` to the index and save it.
+
+        ``loaded`` pairs each chunk with the path of its file. Files that
+        another process ingested meanwhile are skipped; ``duplicates`` are
+        recorded in the manifest. Returns the sources added to the index.
+        """
+
+        rebuild = False
+        with self._write_lock():
+            accepted: dict[str, str] = {}
+            known_digests = set(self._manifest.values())
+            for path, digest in digests.items():
+                if self._manifest.get(path) == digest:
+                    logger.info("Fichier %s ingéré entre-temps par un autre processus", path)
+                    continue
+                if digest in known_digests:
+                    logger.info("Contenu de %s déjà indexé sous un autre fichier", path)
+                    duplicates[path] = digest
+                    continue
+                accepted[path] = digest
+                known_digests.add(digest)
+            stale_sources = {path for path in accepted if path in self._manifest}
+            kept = [
+                position for position, (path, _) in enumerate(loaded) if path in accepted
+            ]
+            if not kept:
+                self._write_manifest({**self._manifest, **duplicates})
+                if digests:
+                    logger.info("Aucun fichier nouveau ou modifié. L'index est à jour.")
+                return []
+            loaded_documents = [loaded[position][1] for position in kept]
+            vectors = [loaded_vectors[position] for position in kept]
+            texts = [doc.page_content for doc in loaded_documents]
+            metadatas = [doc.metadata for doc in loaded_documents]
+            ingested_sources = {
+                doc.metadata.get("source", path)
+                for path, doc in (loaded[position] for position in kept)
+            }
+
+            if self._vector_store is None:
+                self._set_vector_store(
+                    self._new_vector_store(texts, vectors, metadatas)
+                )
+                logger.info(
+                    "Création d'un nouvel index FAISS avec %s fragments de documents", len(loaded_documents)
+                )
+            elif stale_sources and self._delete_sources(stale_sources) is None:
+                # Appending would leave the old chunks searchable next to the
+                # new ones; the rebuild runs once the lock is released.
+                rebuild = True
+            else:
+                self._ensure_writable_index()
+                self._vector_store.add_embeddings(
+                    list(zip(texts, vectors)), metadatas=metadatas
+                )
+                self._on_index_changed()
+                logger.info(
+                    "Ajout de %s fragments de documents à l'index FAISS existant",
+                    len(loaded_documents),
+                )
+                if needs_training(self.index_type, self._vector_store.index):
+                    # Built flat while the corpus was small; large enough now.
+                    self._convert_index()
+
+            if not rebuild:
+                self._save_vector_store()
+                self._write_manifest({**self._manifest, **duplicates, **accepted})
+        if rebuild:
             logger.info(
-                "Ajout de %s fragments de documents à l'index FAISS existant",
-                len(loaded_documents),
+                "L'index actuel ne permet pas de retirer les anciennes versions de %s : "
+                "reconstruction complète",
+                sorted(stale_sources),
             )
-
-        self.index_path.mkdir(parents=True, exist_ok=True)
-        self._vector_store.save_local(str(self.index_path))
+            self._rebuild_indexed_files([Path(path) for path in accepted])
+            return sorted(ingested_sources)
         logger.info(
             "Index FAISS sauvegardé dans %s. Sources ingérées : %s",
             self.index_path,
@@ -163,31 +911,427 @@ class ChatbotEngine:
         )
         return sorted(ingested_sources)
 
+    def _rebuild_indexed_files(self, paths: Iterable[Path] = ()) -> None:
+        """Rebuild the index from the files it holds, plus ``paths``.
+
+        Fallback for index types that cannot remove vectors in place. The
+        chunks that did not change come back from the embedding cache.
+        """
+
+        with self._write_lock():
+            indexed = [Path(path) for path in self._manifest]
+        self.rebuild_index(
+            [
+                path
+                for path in dict.fromkeys([*indexed, *paths])
+                if path.parent != self.docs_path and path.exists()
+            ]
+        )
+
+    def _load_and_split(self, path: Path) -> tuple[Path, list[Document]]:
+        logger.info("Ingestion du fichier %s", path)
+        documents = self._load_documents_from_path(path)
+        return path, self._split_documents(documents) if documents else []
+
+    def remove_files(self, paths: Iterable[Path]) -> bool:
+        """Drop the chunks of ``paths`` from the index without re-embedding.
+
+        Returns False when the current index type cannot delete vectors in
+        place (HNSW, IVF, refine); callers then fall back to :meth:`rebuild_index`.
+        """
+
+        sources = {str(path) for path in paths}
+        with self._write_lock():
+            if self._vector_store is None:
+                return True
+            removed = self._delete_sources(sources)
+            if removed is None:
+                return False
+            if removed:
+                self._save_vector_store()
+
+            removed_digests = {
+                self._manifest[source] for source in sources if source in self._manifest
+            }
+            manifest = {
+                path: digest
+                for path, digest in self._manifest.items()
+                if path not in sources
+            }
+            # Copies skipped as duplicates relied on the chunks just removed.
+            indexed_sources = self._indexed_sources()
+            orphans = [
+                Path(path)
+                for path, digest in manifest.items()
+                if digest in removed_digests and path not in indexed_sources
+            ]
+            for orphan in orphans:
+                del manifest[str(orphan)]
+            self._write_manifest(manifest)
+        logger.info(
+            "%s fragments supprimés de l'index FAISS pour %s", removed, sorted(sources)
+        )
+        if orphans:
+            self.ingest_files(orphans)
+        return True
+
+    def _delete_sources(self, sources: set[str]) -> int | None:
+        """Delete every chunk whose source is in ``sources``; lock must be held.
+
+        Returns the number of chunks removed, or None when the index type
+        cannot remove vectors in place.
+        """
+
+        # Flat-code indexes compact on removal, which is what LangChain's
+        # position-based index_to_docstore_id mapping expects.
+        index = faiss.downcast_index(self._vector_store.index)
+        if not isinstance(index, faiss.IndexFlatCodes):
+            return None
+
+        docstore = self._vector_store.docstore
+        ids = [
+            doc_id
+            for doc_id in self._vector_store.index_to_docstore_id.values()
+            if getattr(docstore.search(doc_id), "metadata", {}).get("source") in sources
+        ]
+        if ids:
+            self._ensure_writable_index()
+            self._vector_store.delete(ids)
+            self._on_index_changed()
+        return len(ids)
+
+    def _indexed_sources(self) -> set[str]:
+        docstore = self._vector_store.docstore
+        return {
+            getattr(docstore.search(doc_id), "metadata", {}).get("source")
+            for doc_id in self._vector_store.index_to_docstore_id.values()
+        }
+
+    def _ensure_writable_index(self) -> None:
+        """Replace a memory-mapped index with an in-RAM copy that accepts writes.
+
+        The copy is re-read from disk: ``faiss.clone_index`` cannot copy the
+        on-disk inverted lists of a mapped IVF index, and mapped codes are
+        read-only. Callers hold the index lock after :meth:`_reload_if_stale`,
+        so the file matches the index.
+        """
+
+        if self._index_mmapped:
+            self._vector_store.index = faiss.read_index(
+                str(self.index_path / "index.faiss")
+            )
+            self._index_mmapped = False
+
     def rebuild_index(self, extra_paths: Iterable[Path] | None = None) -> None:
         """Rebuild the FAISS index from scratch using all known documents."""
 
         logger.info("Reconstruction complète de l'index FAISS demandée")
+        extra_paths = list(extra_paths or [])
         documents = self._load_all_documents(self.docs_path)
-        for path in extra_paths or []:
+        for path in extra_paths:
             documents.extend(self._load_documents_from_path(path))
 
         if not documents:
             logger.info(
                 "Aucun document disponible. L'index FAISS sera supprimé et désactivé."
             )
-            self._vector_store = None
-            if self.index_path.exists():
-                shutil.rmtree(self.index_path)
+            with self._write_lock():
+                self._set_vector_store(None)
+                self._manifest = {}
+                self._index_mtime_ns = None
+                if self.index_path.exists():
+                    shutil.rmtree(self.index_path)
             return
 
-        split_docs = self.text_splitter.split_documents(documents)
-        self._vector_store = FAISS.from_documents(split_docs, self.embedding)
-        self.index_path.mkdir(parents=True, exist_ok=True)
-        self._vector_store.save_local(str(self.index_path))
+        split_docs = self._split_documents(documents)
+        vector_store = self._build_vector_store(split_docs)
+        with self._write_lock():
+            self._set_vector_store(vector_store)
+            self._index_mmapped = False
+            self._save_vector_store()
+            self._write_manifest(
+                {
+                    str(path): self._file_digest(path)
+                    for path in [*self._list_files(self.docs_path), *extra_paths]
+                    if path.exists()
+                }
+            )
         logger.info(
             "Index FAISS reconstruit avec %s fragments de documents", len(split_docs)
         )
 
+    def _split_documents(self, documents: list[Document]) -> list[Document]:
+        """Split ``documents`` and prefix each chunk with its document and section.
+
+        Chunks from repetitive documents embed almost identically without this
+        positional context. The unprefixed text is kept in ``raw_text`` for the
+        LLM prompt.
+        """
+
+        split_docs = self.text_splitter.split_documents(documents)
+        for doc in split_docs:
+            doc.metadata["raw_text"] = doc.page_content
+            header = f"Document: {Path(doc.metadata.get('source', '')).stem}\n"
+            section = self._section_label(doc.metadata)
+            if section:
+                header += f"Section: {section}\n"
+            doc.page_content = f"{header}\n{doc.page_content}"
+        return split_docs
+
+    @staticmethod
+    def _section_label(metadata: dict) -> str:
+        if "page_label" in metadata:
+            return f"page {metadata['page_label']}"
+        if isinstance(metadata.get("page"), int):
+            return f"page {metadata['page'] + 1}"
+        if "row" in metadata:
+            return f"ligne {metadata['row'] + 1}"
+        return ""
+
+    # ------------------------------------------------------------------
+    # Embedding helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _batch_texts(texts: list[str]) -> Iterator[list[str]]:
+        """Group ``texts`` into batches that one embedding request accepts.
+
+        Large inputs use full 2048-input batches; smaller ones are split into
+        up to EMBEDDING_PARALLEL_REQUESTS batches sent concurrently.
+        """
+
+        batch_size = min(
+            EMBEDDING_BATCH_SIZE,
+            max(
+                EMBEDDING_MIN_BATCH_SIZE,
+                -(-len(texts) // EMBEDDING_PARALLEL_REQUESTS),
+            ),
+        )
+        token_counts = map(len, _embedding_encoding().encode_ordinary_batch(texts))
+        batch: list[str] = []
+        batch_tokens = 0
+        for text, tokens in zip(texts, token_counts):
+            if batch and (
+                len(batch) >= batch_size
+                or batch_tokens + tokens > EMBEDDING_BATCH_MAX_TOKENS
+            ):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    async def _aembed_texts(
+        self, texts: list[str], offline: bool = False
+    ) -> list[list[float]]:
+        """Embed ``texts`` by sending every batch to OpenAI concurrently.
+
+        Identical texts are embedded once and their vector is reused for every
+        copy. Texts carry the document and section header added by
+        :meth:`_split_documents`, so only repeats within one section of one
+        document collide; boilerplate shared across files or pages embeds
+        separately, on purpose. Texts embedded by an earlier ingestion come
+        from the embedding cache.
+        """
+
+        unique_texts = list(dict.fromkeys(texts))
+        # SQLite calls run off the event loop, which other requests share.
+        vectors_by_text = await asyncio.to_thread(
+            self._embedding_cache.get_many, unique_texts
+        )
+        missing_texts = [text for text in unique_texts if text not in vectors_by_text]
+        batches = list(self._batch_texts(missing_texts))
+        logger.info(
+            "Calcul des embeddings de %s fragments (%s uniques, %s déjà en cache) "
+            "en %s requêtes parallèles",
+            len(texts),
+            len(unique_texts),
+            len(vectors_by_text),
+            len(batches),
+        )
+        if offline and batches:
+            results = await self._aembed_offline(batches)
+        else:
+            results = await asyncio.gather(
+                *(self._aembed_batch(batch) for batch in batches)
+            )
+        new_vectors = [vector for batch_vectors in results for vector in batch_vectors]
+        if missing_texts:
+            await asyncio.to_thread(
+                self._embedding_cache.put_many, missing_texts, new_vectors
+            )
+        vectors_by_text.update(zip(missing_texts, new_vectors))
+        return [vectors_by_text[text] for text in texts]
+
+    async def _aembed_batch(self, batch: list[str]) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+        semaphore = self._embedding_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(EMBEDDING_MAX_CONCURRENCY)
+            self._embedding_semaphores[loop] = semaphore
+        async with semaphore:
+            return await self.embedding.aembed_documents(batch)
+
+    async def _aembed_offline(self, batches: list[list[str]]) -> list[list[list[float]]]:
+        """Embed ``batches`` with OpenAI Batch API jobs and wait for them.
+
+        Batches are grouped into jobs of at most EMBEDDING_BATCH_JOB_MAX_INPUTS
+        inputs, which run side by side.
+        """
+
+        groups: list[dict[int, list[str]]] = []
+        inputs = 0
+        for position, batch in enumerate(batches):
+            if not groups or inputs + len(batch) > EMBEDDING_BATCH_JOB_MAX_INPUTS:
+                groups.append({})
+                inputs = 0
+            groups[-1][position] = batch
+            inputs += len(batch)
+        results: list[list[list[float]]] = [[] for _ in batches]
+        for job_results in await asyncio.gather(
+            *(self._arun_batch_job(group) for group in groups)
+        ):
+            for position, vectors in job_results.items():
+                results[position] = vectors
+        return results
+
+    async def _arun_batch_job(
+        self, batches: dict[int, list[str]]
+    ) -> dict[int, list[list[float]]]:
+        """Run one Batch API job over ``batches``, keyed by their position.
+
+        The job id is recorded beside the index under the hash of its
+        requests until the results are read, so a process restarted while
+        waiting resumes the job instead of submitting (and paying for) it
+        again.
+        """
+
+        client = self.async_client
+        model = self.embedding.embeddings.model
+        requests = "\n".join(
+            json.dumps(
+                {
+                    "custom_id": str(position),
+                    "method": "POST",
+                    "url": "/v1/embeddings",
+                    "body": {"model": model, "input": batch},
+                }
+            )
+            for position, batch in batches.items()
+        )
+        key = hashlib.sha256(requests.encode("utf-8")).hexdigest()
+        job = None
+        job_id = self._read_batch_jobs().get(key)
+        if job_id is not None:
+            try:
+                job = await client.batches.retrieve(job_id)
+            except openai.NotFoundError:
+                job = None
+            if job is not None and job.status in {"failed", "expired", "cancelled"}:
+                job = None
+            if job is not None:
+                logger.info("Reprise de la tâche Batch OpenAI %s déjà soumise", job.id)
+        if job is None:
+            input_file = await client.files.create(
+                file=("embeddings.jsonl", requests.encode("utf-8")), purpose="batch"
+            )
+            job = await client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/embeddings",
+                completion_window="24h",
+            )
+            self._record_batch_job(key, job.id)
+            logger.info(
+                "Tâche Batch OpenAI %s soumise pour %s requêtes d'embeddings",
+                job.id,
+                len(batches),
+            )
+        while job.status not in {"completed", "failed", "expired", "cancelled"}:
+            await asyncio.sleep(EMBEDDING_BATCH_POLL_SECONDS)
+            job = await client.batches.retrieve(job.id)
+        if job.status != "completed" or not job.output_file_id:
+            self._record_batch_job(key, None)
+            raise RuntimeError(f"La tâche Batch OpenAI {job.id} a échoué : {job.status}")
+        if job.request_counts and job.request_counts.failed:
+            self._record_batch_job(key, None)
+            raise RuntimeError(
+                f"La tâche Batch OpenAI {job.id} a échoué pour "
+                f"{job.request_counts.failed} requêtes"
+            )
+
+        output = await client.files.content(job.output_file_id)
+        results: dict[int, list[list[float]]] = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            data = sorted(record["response"]["body"]["data"], key=lambda item: item["index"])
+            results[int(record["custom_id"])] = [item["embedding"] for item in data]
+        self._record_batch_job(key, None)
+        logger.info("Tâche Batch OpenAI %s terminée", job.id)
+        return results
+
+    @property
+    def _batch_jobs_path(self) -> Path:
+        # Beside the index directory, which does not exist yet on a first build.
+        return self.index_path.with_name(f"{self.index_path.name}.batch_jobs.json")
+
+    def _read_batch_jobs(self) -> dict[str, str]:
+        try:
+            with self._batch_jobs_path.open(encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def _record_batch_job(self, key: str, job_id: str | None) -> None:
+        """Remember ``job_id`` as the Batch API job for ``key``, or forget it."""
+
+        jobs = self._read_batch_jobs()
+        if job_id is None:
+            jobs.pop(key, None)
+        else:
+            jobs[key] = job_id
+        self._batch_jobs_path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, name = tempfile.mkstemp(
+            dir=self._batch_jobs_path.parent, suffix=".tmp"
+        )
+        with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+            json.dump(jobs, handle, indent=2, sort_keys=True)
+        os.replace(name, self._batch_jobs_path)
+
+    def _build_vector_store(
+        self, split_docs: list[Document], offline: bool = False
+    ) -> FAISS:
+        """Embed ``split_docs`` and wrap them in a new FAISS store.
+
+        With ``offline`` the vectors come from the OpenAI Batch API instead
+        of concurrent interactive requests.
+        """
+
+        texts = [doc.page_content for doc in split_docs]
+        vectors = _run_async(self._aembed_texts(texts, offline=offline))
+        return self._new_vector_store(
+            texts, vectors, [doc.metadata for doc in split_docs]
+        )
+
+    def _new_vector_store(
+        self,
+        texts: list[str],
+        vectors: list[list[float]],
+        metadatas: list[dict],
+    ) -> FAISS:
+        """Train an index of the configured type on ``vectors`` and fill it."""
+
+        index = create_index(self.index_type, np.asarray(vectors, dtype="float32"))
+        vector_store = FAISS(
+            embedding_function=self.embedding,
+            index=index,
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+        )
+        vector_store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+        return vector_store
+
     # ------------------------------------------------------------------
     # Chat interaction
     # ------------------------------------------------------------------
@@ -215,6 +1359,78 @@ class ChatbotEngine:
     ) -> tuple[str, str, list[str]]:
         """Return the assistant answer, selected mode and supporting documents."""
 
+        plan = self._plan_chat(message, mode, history)
+        if plan.answer is not None:
+            return plan.answer, plan.intent, plan.sources
+
+        answer = self._prompt_cache.get(self.llm_name, plan.prompt)
+        if answer is not None:
+            logger.info("Réponse servie depuis le cache des prompts (%s)", plan.intent)
+        else:
+            completion = self.client.chat.completions.create(
+                model=self.llm_name,
+                messages=[{"role": "user", "content": plan.prompt}],
+            )
+            answer = completion.choices[0].message.content or ""
+            logger.info("Réponse générée (%s) : %s", plan.intent, answer)
+            self._prompt_cache.put(self.llm_name, plan.prompt, answer)
+        result = (answer, plan.intent, plan.sources)
+        if plan.cache_vector is not None:
+            self._response_cache.put(plan.cache_key, plan.cache_vector, result)
+        return result
+
+    def chat_stream(
+        self,
+        message: str,
+        mode: str = "rag",
+        history: Iterable[dict[str, str]] | None = None,
+    ) -> tuple[str, list[str], Iterator[str]]:
+        """Return the selected mode, supporting documents and an answer token stream.
+
+        Retrieval runs before this method returns so callers can send the
+        metadata immediately; the LLM is only called while the stream is consumed.
+        """
+
+        plan = self._plan_chat(message, mode, history)
+        return plan.intent, plan.sources, self._stream_answer(plan)
+
+    def _stream_answer(self, plan: _ChatPlan) -> Iterator[str]:
+        if plan.answer is not None:
+            yield plan.answer
+            return
+
+        answer = self._prompt_cache.get(self.llm_name, plan.prompt)
+        if answer is not None:
+            logger.info("Réponse servie depuis le cache des prompts (%s)", plan.intent)
+            yield answer
+        else:
+            parts: list[str] = []
+            stream = self.client.chat.completions.create(
+                model=self.llm_name,
+                messages=[{"role": "user", "content": plan.prompt}],
+                stream=True,
+            )
+            for chunk in stream:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    parts.append(content)
+                    yield content
+            answer = "".join(parts)
+            logger.info("Réponse générée en flux (%s) : %s", plan.intent, answer)
+            self._prompt_cache.put(self.llm_name, plan.prompt, answer)
+        if plan.cache_vector is not None:
+            self._response_cache.put(
+                plan.cache_key, plan.cache_vector, (answer, plan.intent, plan.sources)
+            )
+
+    def _plan_chat(
+        self,
+        message: str,
+        mode: str,
+        history: Iterable[dict[str, str]] | None,
+    ) -> _ChatPlan:
+        """Validate the request, run retrieval and build the prompt to send."""
+
         logger.info("Réception d'un message utilisateur : %s", message)
 
         detected_language = self._detect_language(message)
@@ -227,6 +1443,7 @@ class ChatbotEngine:
         history_entries = list(history or [])
         history_text = self._render_history(history_entries)
 
+        self._reload_if_stale()
         has_documents = self._has_documents()
 
         if not has_documents:
@@ -238,47 +1455,136 @@ class ChatbotEngine:
                 "Téléversez un fichier dans le panneau 'Documents RAG' et activez le "
                 "mode RAG pour obtenir une réponse contextuelle."
             )
-            return warning, "NoDocuments", []
+            return _ChatPlan("NoDocuments", [], answer=warning)
 
-        retrieved_docs: list[Document] = []
-        if normalized_mode == "rag" and self._vector_store is not None:
-            retriever = self._vector_store.as_retriever()
-            retrieved_docs = retriever.invoke(message)
+        # Answers depend on the conversation, so only standalone questions are
+        # served from (and stored in) the semantic cache.
+        query_vector: list[float] | None = None
+        if not history_entries:
+            query_vector = self.embedding.embed_query(message)
+            cached = self._response_cache.get(normalized_mode, query_vector)
+            if cached is not None:
+                logger.info("Réponse servie depuis le cache sémantique")
+                answer, intent, sources = cached
+                return _ChatPlan(intent, sources, answer=answer)
 
-        logger.info(
-            "Documents récupérés : %s",
-            [doc.metadata.get("source", "Unknown source") for doc in retrieved_docs],
-        )
+        if normalized_mode == "direct":
+            prompt = self._build_direct_prompt(
+                message, history_text, language_instruction
+            )
+            return _ChatPlan(
+                "Direct",
+                [],
+                prompt=prompt,
+                cache_key=normalized_mode,
+                cache_vector=query_vector,
+            )
 
-        used_sources = [doc.metadata.get("source", "Unknown source") for doc in retrieved_docs]
+        retrieved_docs = self._retrieve(message, query_vector)
 
-        if normalized_mode == "rag":
-            context = "\n\n".join(doc.page_content for doc in retrieved_docs)
-            if not context.strip():
-                logger.info(
-                    "Aucun contexte disponible pour le mode RAG. Réponse informative envoyée.")
-                response = self._call_no_context_response(
-                    message, history_text, language_instruction
-                )
-                return response.content, "Rag", used_sources
+        used_sources: list[str] = []
+        # Identical chunks (boilerplate repeated across files) are sent once.
+        unique_texts: dict[str, None] = {}
+        has_context = False
+        for doc in retrieved_docs:
+            used_sources.append(doc.metadata.get("source", "Unknown source"))
+            text = doc.metadata.get("raw_text", doc.page_content)
+            unique_texts[text] = None
+            # isspace() stops at the first visible character, unlike strip().
+            has_context = has_context or (bool(text) and not text.isspace())
+        logger.info("Documents récupérés : %s", used_sources)
 
-            response = self._call_rag_response(
+        if not has_context:
+            logger.info(
+                "Aucun contexte disponible pour le mode RAG. Réponse informative envoyée.")
+            prompt = self._build_no_context_prompt(
+                message, history_text, language_instruction
+            )
+        else:
+            context = self._pack_context(list(unique_texts), MAX_CONTEXT_TOKENS)
+            prompt = self._build_rag_prompt(
                 message, context, history_text, language_instruction
             )
-            logger.info("Réponse générée (RAG) : %s", response.content)
             logger.info("Sources utilisées : %s", used_sources)
-            return response.content, "Rag", used_sources
+        return _ChatPlan(
+            "Rag",
+            used_sources,
+            prompt=prompt,
+            cache_key=normalized_mode,
+            cache_vector=query_vector,
+        )
+
+    def _pack_context(self, texts: list[str], max_tokens: int) -> str:
+        """Join the best-ranked ``texts`` that fit ``max_tokens`` as whole chunks.
+
+        A chunk is never cut mid-sentence, except the first one when it alone
+        exceeds the budget, so the prompt always carries some context.
+        """
 
-        response = self._call_direct_response(message, history_text, language_instruction)
-        logger.info("Réponse générée (direct) : %s", response.content)
-        return response.content, "Direct", []
+        encoding = self._prompt_encoding
+        token_counts = [len(encoding.encode_ordinary(text)) for text in texts]
+        pieces: list[str] = []
+        total = 0
+        for text, tokens in zip(texts, token_counts):
+            if total + tokens > max_tokens:
+                if not pieces:
+                    pieces.append(
+                        encoding.decode(encoding.encode_ordinary(text)[:max_tokens])
+                    )
+                break
+            pieces.append(text)
+            total += tokens
+        return "\n\n".join(pieces)
+
+    def _retrieve(
+        self, message: str, query_vector: list[float] | None = None
+    ) -> list[Document]:
+        # Embed outside the lock, and only when the caller has no vector yet.
+        if query_vector is None:
+            query_vector = self.embedding.embed_query(message)
+        with self._index_lock:
+            if self._dense_matrix is not None:
+                return self._search_dense(query_vector)
+            if self._gpu_index is not None:
+                return self._search_gpu(query_vector)
+            if self._vector_store is None:
+                return []
+            return self._vector_store.similarity_search_by_vector(
+                query_vector, k=RETRIEVER_K
+            )
+
+    def _search_dense(self, query_vector: list[float]) -> list[Document]:
+        # OpenAI embeddings are unit length, so cosine order matches the L2
+        # order the FAISS indexes use.
+        query = np.asarray(query_vector, dtype="float32")
+        scores = self._dense_matrix @ (query / np.linalg.norm(query))
+        k = min(RETRIEVER_K, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return self._documents_at(top[np.argsort(-scores[top])])
+
+    def _search_gpu(self, query_vector: list[float]) -> list[Document]:
+        _, positions = self._gpu_index.search(
+            np.asarray([query_vector], dtype="float32"), RETRIEVER_K
+        )
+        return self._documents_at(positions[0])
+
+    def _documents_at(self, positions: Iterable[int]) -> list[Document]:
+        documents: list[Document] = []
+        for position in positions:
+            if position == -1:
+                continue
+            doc_id = self._vector_store.index_to_docstore_id[int(position)]
+            document = self._vector_store.docstore.search(doc_id)
+            if isinstance(document, Document):
+                documents.append(document)
+        return documents
 
     # ------------------------------------------------------------------
     # Prompt helpers
     # ------------------------------------------------------------------
     def _render_history(self, history: Iterable[dict[str, str]]) -> str:
         lines: list[str] = []
-        for entry in history:
+        for entry in list(history)[-MAX_HISTORY_ENTRIES:]:
             role = entry.get("role", "user")
             content = entry.get("content", "").strip()
             if not content:
@@ -287,68 +1593,66 @@ class ChatbotEngine:
             lines.append(f"{speaker} : {content}")
         return "\n".join(lines)
 
-    def _call_rag_response(
+    def _build_rag_prompt(
         self,
         message: str,
         context: str,
         history_text: str,
         language_instruction: str,
-    ) -> AIMessage:
+    ) -> str:
         conversation_block = (
             f"Historique de la conversation :\n{history_text}\n\n"
             if history_text
             else ""
         )
+        # Fixed instructions first and the question last: the longer the
+        # prefix shared with earlier turns, the more OpenAI prompt caching hits.
         prompt = (
+            "En te basant uniquement sur les extraits de documents fournis, réponds à"
+            " la dernière question de l'utilisateur.\n"
+            "Si les documents ne contiennent pas l'information demandée, dis-le explicitement"
+            " sans inventer de réponse.\n\n"
             f"{conversation_block}"
             "Voici des extraits de documents :\n"
             f"{context}\n\n"
-            "En te basant uniquement sur ces extraits, réponds à la question suivante :\n"
-            f"{message}\n\n"
-            "Si les documents ne contiennent pas l'information demandée, dis-le explicitement"
-            " sans inventer de réponse.\n"
-            f"{language_instruction}"
+            f"{language_instruction}\n"
+            "Question :\n"
+            f"{message}"
         )
         logger.info("Envoi au LLM (RAG) avec le prompt : %s", prompt)
-        response = self.model.invoke(prompt)
-        logger.info("Réponse du LLM (RAG) : %s", response.content)
-        return response
+        return prompt
 
-    def _call_direct_response(
+    def _build_direct_prompt(
         self, message: str, history_text: str, language_instruction: str
-    ) -> AIMessage:
+    ) -> str:
         conversation_block = (
             f"Historique de la conversation :\n{history_text}\n\n"
             if history_text
             else ""
         )
         prompt = (
+            "Réponds de manière utile et concise.\n\n"
             f"{conversation_block}"
+            f"{language_instruction}\n"
             "Dernière question de l'utilisateur :\n"
-            f"{message}\n\n"
-            "Réponds de manière utile et concise.\n"
-            f"{language_instruction}"
+            f"{message}"
         )
         logger.info("Envoi au LLM (direct) du message : %s", prompt)
-        response = self.model.invoke(prompt)
-        logger.info("Réponse du LLM (direct) : %s", response.content)
-        return response
+        return prompt
 
-    def _call_no_context_response(
+    def _build_no_context_prompt(
         self, message: str, history_text: str, language_instruction: str
-    ) -> AIMessage:
+    ) -> str:
         prompt = (
             "Tu n'as trouvé aucune information pertinente dans les documents fournis.\n"
             "Explique cette situation à l'utilisateur de manière polie et suggère d'ajouter"
             " des documents contenant la réponse recherchée.\n"
-            f"Question de l'utilisateur : {message}\n"
             f"Historique disponible : {history_text if history_text else 'Aucun'}\n\n"
-            f"{language_instruction}"
+            f"{language_instruction}\n"
+            f"Question de l'utilisateur : {message}"
         )
         logger.info("Envoi au LLM (RAG - pas de contexte) du message : %s", prompt)
-        response = self.model.invoke(prompt)
-        logger.info("Réponse du LLM (RAG - pas de contexte) : %s", response.content)
-        return response
+        return prompt
 
     def _detect_language(self, message: str) -> str:
         cleaned_message = message.strip()
@@ -378,76 +1682,41 @@ class ChatbotEngine:
     # ------------------------------------------------------------------
     # File loader helpers
     # ------------------------------------------------------------------
-    def _load_all_documents(self, folder_path: Path) -> list[Document]:
-        documents: list[Document] = []
+    @staticmethod
+    def _list_files(folder_path: Path) -> list[Path]:
         if not folder_path.exists():
-            return documents
-        for file in folder_path.iterdir():
-            if file.is_file():
-                documents.extend(self._load_documents_from_path(file))
-        return documents
+            return []
+        return [file for file in folder_path.iterdir() if file.is_file()]
 
-    def _load_documents_from_path(self, path: Path) -> list[Document]:
-        loader: (
-            CSVLoader
-            | Docx2txtLoader
-            | JSONLoader
-            | PyPDFLoader
-            | TextLoader
-            | UnstructuredHTMLLoader
-            | UnstructuredMarkdownLoader
-            | UnstructuredXMLLoader
-        )
-        documents: list[Document] = []
-        if not path.exists():
-            return documents
-        try:
-            suffix = path.suffix.lower()
-            if suffix == ".pdf":
-                loader = PyPDFLoader(str(path))
-                documents = loader.load()
-            elif suffix == ".txt":
-                loader = TextLoader(str(path))
-                documents = loader.load()
-            elif suffix == ".docx":
-                loader = Docx2txtLoader(str(path))
-                documents = loader.load()
-            elif suffix == ".md":
-                try:
-                    loader = UnstructuredMarkdownLoader(str(path))
-                    documents = loader.load()
-                except Exception:
-                    loader = TextLoader(str(path))
-                    documents = loader.load()
-            elif suffix in {".html", ".htm"}:
-                loader = UnstructuredHTMLLoader(str(path))
-                documents = loader.load()
-            elif suffix == ".xml":
-                loader = UnstructuredXMLLoader(str(path))
-                documents = loader.load()
-            elif suffix == ".json":
-                loader = JSONLoader(str(path), jq_schema=".", text_content=False)
-                documents = loader.load()
-                for doc in documents:
-                    doc.page_content = str(doc.page_content)
-            elif suffix == ".csv":
-                loader = CSVLoader(file_path=str(path))
-                documents = loader.load()
-        except Exception as exc:  # pragma: no cover - defensive logging
-            print(f"⚠️ Erreur en chargeant {path.name} : {exc}")
+    def _load_all_documents(self, folder_path: Path) -> list[Document]:
+        files = self._list_files(folder_path)
+        if not files:
             return []
+        if len(files) == 1:
+            return _load_documents(files[0])
+        # "spawn" rather than fork: the server process runs threads (HTTP
+        # pool, ingestion executor) that a forked child could deadlock on.
+        with cf.ProcessPoolExecutor(
+            max_workers=min(LOADER_MAX_PROCESSES, len(files)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            results = tqdm(
+                executor.map(_load_documents, files),
+                total=len(files),
+                desc="Chargement des documents",
+                unit="fichier",
+            )
+            return list(itertools.chain.from_iterable(results))
 
-        for doc in documents:
-            doc.metadata.setdefault("source", str(path))
-        return documents
+    def _load_documents_from_path(self, path: Path) -> list[Document]:
+        return _load_documents(path)
 
 
 # Global singleton to avoid rebuilding the FAISS index repeatedly.
-_ENGINE: ChatbotEngine | None = None
-
-
 _ENGINE: ChatbotEngine | None = None
 _ENGINE_KEY: str | None = None
+_ENGINE_LOCK = threading.Lock()
+
 
 def get_engine() -> ChatbotEngine:
     global _ENGINE, _ENGINE_KEY
@@ -456,9 +1725,32 @@ def get_engine() -> ChatbotEngine:
     if not current_key:
         raise RuntimeError("OPENAI_API_KEY must be provided in the environment.")
 
-    # Rebuild engine if first time OR if key changed
-    if _ENGINE is None or current_key != _ENGINE_KEY:
-        _ENGINE = ChatbotEngine()
-        _ENGINE_KEY = current_key
+    # Rebuild engine if first time OR if key changed. The lock stops concurrent
+    # first requests from each loading the FAISS index.
+    engine = _ENGINE
+    if engine is None or current_key != _ENGINE_KEY:
+        with _ENGINE_LOCK:
+            if _ENGINE is None or current_key != _ENGINE_KEY:
+                _ENGINE = ChatbotEngine()
+                _ENGINE_KEY = current_key
+            engine = _ENGINE
+
+    return engine
+
+
+def _reset_after_fork() -> None:
+    """Give a forked worker (``gunicorn --preload``) its own clients and loop.
+
+    The child inherits the cached loop object but not the thread running it,
+    so ``_run_async`` would block forever on the parent's loop.
+    """
+
+    _async_loop.cache_clear()
+    _shared_async_http_client.cache_clear()
+    _shared_http_client.cache_clear()
+    if _ENGINE is not None:
+        _ENGINE._after_fork()
+
 
-    return _ENGINE
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
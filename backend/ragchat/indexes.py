@@ -0,0 +1,206 @@
+"""FAISS index factories used by the chatbot engine."""
+from __future__ import annotations
+
+import logging
+import math
+from typing import Callable
+
+import faiss
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+# Below this many vectors an exhaustive scan is fast enough and IVF training
+# would not get enough points per centroid.
+IVF_MIN_VECTORS = 10_000
+IVF_NPROBE = 16
+IVFPQ_NPROBE = 8
+IVFPQ_SUBQUANTIZERS = 32
+
+# Binary search over-fetches this many candidates per requested result before
+# the exact float32 rerank (k=4 -> top-100).
+BINARY_RERANK_FACTOR = 25
+
+# HNSW graph parameters: neighbours per node and search/construction beams.
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+
+# IVF index types, mapped to the multiple their dimension must be of. Below
+# IVF_MIN_VECTORS (or for other dimensions) they are built as a flat index,
+# and re-trained by the engine once the corpus grows past the threshold.
+IVF_DIMENSION_MULTIPLES = {"ivfpq_fastscan": 4, "ivfpq": IVFPQ_SUBQUANTIZERS, "ivf_sq8": 1}
+
+
+def uses_ivf(kind: str, count: int, dimension: int) -> bool:
+    """Whether ``kind`` builds an IVF index for ``count`` vectors of ``dimension``."""
+
+    multiple = IVF_DIMENSION_MULTIPLES.get(kind)
+    return multiple is not None and count >= IVF_MIN_VECTORS and dimension % multiple == 0
+
+
+def needs_training(kind: str, index: faiss.Index) -> bool:
+    """Whether the flat stand-in of an IVF ``kind`` has grown enough to train it."""
+
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlat) and uses_ivf(
+        kind, index.ntotal, index.d
+    )
+
+
+def _flat_index(vectors: np.ndarray) -> faiss.Index:
+    return faiss.IndexFlatL2(vectors.shape[1])
+
+
+def _ivfpq_fastscan_index(vectors: np.ndarray) -> faiss.Index:
+    count, dimension = vectors.shape
+    if not uses_ivf("ivfpq_fastscan", count, dimension):
+        return _flat_index(vectors)
+    nlist = int(4 * math.sqrt(count))
+    # 4-bit PQ codes in the interleaved FastScan layout, searched with SIMD LUTs.
+    index = faiss.index_factory(dimension, f"IVF{nlist},PQ{dimension // 4}x4fs")
+    index.train(vectors)
+    faiss.extract_index_ivf(index).nprobe = IVF_NPROBE
+    return index
+
+
+def _ivfpq_index(vectors: np.ndarray) -> faiss.Index:
+    count, dimension = vectors.shape
+    if not uses_ivf("ivfpq", count, dimension):
+        return _flat_index(vectors)
+    nlist = int(math.sqrt(count))
+    # 8-bit PQ codes: 32 bytes per vector instead of 4 * dimension.
+    index = faiss.index_factory(dimension, f"IVF{nlist},PQ{IVFPQ_SUBQUANTIZERS}")
+    index.train(vectors)
+    faiss.extract_index_ivf(index).nprobe = IVFPQ_NPROBE
+    return index
+
+
+def _ivf_sq8_index(vectors: np.ndarray) -> faiss.Index:
+    count, dimension = vectors.shape
+    if not uses_ivf("ivf_sq8", count, dimension):
+        return _flat_index(vectors)
+    nlist = int(4 * math.sqrt(count))
+    # One byte per dimension: 4x smaller than float32 with near-exact distances.
+    index = faiss.index_factory(dimension, f"IVF{nlist},SQ8")
+    index.train(vectors)
+    faiss.extract_index_ivf(index).nprobe = IVF_NPROBE
+    return index
+
+
+def _hnsw_index(vectors: np.ndarray) -> faiss.Index:
+    # Graph search is logarithmic in the corpus size and needs no training.
+    index = faiss.IndexHNSWFlat(vectors.shape[1], HNSW_M)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.hnsw.efSearch = HNSW_EF_SEARCH
+    return index
+
+
+def _has_simd_kernels() -> bool:
+    """Return True when the loaded faiss build ships AVX2/AVX-512/NEON kernels."""
+
+    get_options = getattr(faiss, "get_compile_options", None)
+    if get_options is None:
+        return True
+    options = get_options()
+    return any(flag in options for flag in ("AVX2", "AVX512", "NEON", "SVE"))
+
+
+def _sq_fp16_index(vectors: np.ndarray) -> faiss.Index:
+    # Half-precision storage: half the RAM and bytes scanned per query. The
+    # fp16 -> fp32 distance loop is only vectorised in SIMD builds of faiss.
+    if not _has_simd_kernels():
+        logger.warning(
+            "La version de faiss chargée n'a pas de noyaux SIMD : l'index fp16 sera lent"
+        )
+    index = faiss.IndexScalarQuantizer(
+        vectors.shape[1], faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2
+    )
+    index.train(vectors)
+    return index
+
+
+def _binary_index(vectors: np.ndarray) -> faiss.Index:
+    # One sign bit per dimension (192 bytes for 1536-d) searched by Hamming
+    # distance with popcount, then candidates reranked on the float32 vectors.
+    # This trades memory for speed, not the reverse: the refine stage keeps
+    # every float32 vector and the sign codes come on top, so the index is
+    # slightly larger than "flat".
+    index = faiss.index_factory(vectors.shape[1], "LSH,RFlat")
+    faiss.downcast_index(index).k_factor = BINARY_RERANK_FACTOR
+    index.train(vectors)
+    return index
+
+
+# Index classes that keep the original float32 vectors, so reconstruct_n
+# returns them exactly and they can be re-indexed without re-embedding.
+LOSSLESS_INDEXES = (faiss.IndexFlat, faiss.IndexHNSWFlat, faiss.IndexRefine)
+
+
+# Read flags mapping the index file instead of copying it into RAM. Plain
+# IO_FLAG_MMAP only maps IVF inverted lists; IO_FLAG_MMAP_IFC (recent faiss)
+# also maps the codes of flat-code, HNSW and refine indexes.
+MMAP_IFC_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+MMAP_READ_FLAGS = faiss.IO_FLAG_MMAP | MMAP_IFC_FLAG | faiss.IO_FLAG_READ_ONLY
+_MMAP_IFC_INDEXES = (faiss.IndexFlatCodes, faiss.IndexHNSW, faiss.IndexRefine)
+
+
+def is_file_backed(index: faiss.Index) -> bool:
+    """Whether ``index``, read with ``MMAP_READ_FLAGS``, keeps its data in the file.
+
+    FastScan block lists, and every index when faiss lacks
+    ``IO_FLAG_MMAP_IFC``, are read fully into private memory.
+    """
+
+    index = faiss.downcast_index(index)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return isinstance(
+            faiss.downcast_InvertedLists(ivf.invlists), faiss.OnDiskInvertedLists
+        )
+    return bool(MMAP_IFC_FLAG) and isinstance(index, _MMAP_IFC_INDEXES)
+
+
+INDEX_FACTORIES: dict[str, Callable[[np.ndarray], faiss.Index]] = {
+    "flat": _flat_index,
+    "ivfpq_fastscan": _ivfpq_fastscan_index,
+    "ivfpq": _ivfpq_index,
+    "ivf_sq8": _ivf_sq8_index,
+    "hnsw": _hnsw_index,
+    "sq_fp16": _sq_fp16_index,
+    "binary": _binary_index,
+}
+
+
+def create_index(kind: str, vectors: np.ndarray) -> faiss.Index:
+    """Return a trained, still empty FAISS index of type ``kind`` for ``vectors``."""
+
+    try:
+        factory = INDEX_FACTORIES[kind]
+    except KeyError as exc:
+        raise ValueError(f"Type d'index FAISS inconnu : {kind}") from exc
+    index = factory(vectors)
+    logger.info(
+        "Index FAISS %s créé pour %s vecteurs de dimension %s",
+        type(index).__name__,
+        vectors.shape[0],
+        vectors.shape[1],
+    )
+    return index
+
+
+def convert_index(kind: str, index: faiss.Index) -> faiss.Index | None:
+    """Return the vectors of ``index`` in a new index of type ``kind``.
+
+    Vectors keep their positions, so the docstore mapping stays valid.
+    Returns None when ``index`` is empty or only holds compressed codes
+    (PQ, scalar quantizers), which would degrade the new index.
+    """
+
+    if index.ntotal == 0 or not isinstance(faiss.downcast_index(index), LOSSLESS_INDEXES):
+        return None
+    vectors = index.reconstruct_n(0, index.ntotal)
+    converted = create_index(kind, vectors)
+    converted.add(vectors)
+    return converted
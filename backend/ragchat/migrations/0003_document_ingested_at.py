@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-15 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ragchat', '0002_ingestjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='ingested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
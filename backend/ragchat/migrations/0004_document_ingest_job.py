@@ -0,0 +1,19 @@
+# Generated by Django 4.2.25 on 2026-10-15 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ragchat', '0003_document_ingested_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='ingest_job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='ragchat.ingestjob'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 """Database models for the RAG chatbot API."""
 from __future__ import annotations
 
+import uuid
+
 from django.db import models
 
 
@@ -10,9 +12,43 @@ class Document(models.Model):
     file = models.FileField(upload_to="uploads/%Y/%m/%d")
     original_name = models.CharField(max_length=255)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    ingested_at = models.DateTimeField(null=True, blank=True)
+    # Background job embedding the file; clients poll it for progress.
+    ingest_job = models.ForeignKey(
+        "IngestJob",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="documents",
+    )
 
     class Meta:
         ordering = ["-uploaded_at"]
 
     def __str__(self) -> str:
         return self.original_name
+
+
+class IngestJob(models.Model):
+    """A background ingestion of files into the FAISS index."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "En attente"
+        RUNNING = "running", "En cours"
+        SUCCEEDED = "succeeded", "Terminée"
+        FAILED = "failed", "Échouée"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    ingested_sources = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.id} ({self.status})"
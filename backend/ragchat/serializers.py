@@ -3,14 +3,40 @@ from __future__ import annotations
 
 from rest_framework import serializers
 
-from .models import Document
+from .models import Document, IngestJob
 
 
 class DocumentSerializer(serializers.ModelSerializer):
+    ingest_status = serializers.CharField(
+        source="ingest_job.status", read_only=True, default=None
+    )
+
     class Meta: # manage upload of file and represent data for api
         model = Document
-        fields = ["id", "original_name", "file", "uploaded_at"]
-        read_only_fields = ["id", "uploaded_at", "original_name"]
+        fields = [
+            "id",
+            "original_name",
+            "file",
+            "uploaded_at",
+            "ingested_at",
+            "ingest_job",
+            "ingest_status",
+        ]
+        read_only_fields = [
+            "id",
+            "uploaded_at",
+            "original_name",
+            "ingested_at",
+            "ingest_job",
+            "ingest_status",
+        ]
+
+
+class IngestJobSerializer(serializers.ModelSerializer):
+    class Meta:  # read-only status of a background ingestion
+        model = IngestJob
+        fields = ["id", "status", "ingested_sources", "error", "created_at", "finished_at"]
+        read_only_fields = fields
 
 
 class ChatMessageSerializer(serializers.Serializer):
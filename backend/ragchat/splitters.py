@@ -0,0 +1,95 @@
+"""Token-aware text splitting for the RAG index."""
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import tiktoken
+from langchain_text_splitters import TextSplitter
+
+
+class SplitThenMergeTextSplitter(TextSplitter):
+    """Split text under a token budget, then merge the pieces back greedily.
+
+    Pass 1 recursively splits on paragraph, line, sentence and word
+    boundaries until every segment fits ``max_tokens``. Pass 2 merges adjacent
+    segments while they fit ``merge_tokens`` and folds fragments shorter than
+    ``min_tokens`` into a neighbour, so the index holds fewer, denser chunks
+    than a fixed character splitter produces.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "text-embedding-3-small",
+        max_tokens: int = 1100,
+        merge_tokens: int = 1150,
+        min_tokens: int = 100,
+        separators: Sequence[str] = ("\n\n", "\n", ". ", " "),
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(chunk_size=merge_tokens, chunk_overlap=0, **kwargs)
+        self._encoding = tiktoken.encoding_for_model(model_name)
+        self.max_tokens = max_tokens
+        self.merge_tokens = merge_tokens
+        self.min_tokens = min_tokens
+        self.separators = tuple(separators)
+
+    def split_text(self, text: str) -> list[str]:
+        segments = self._split(text, self.separators)
+        return [chunk for chunk, _ in self._merge(segments) if chunk.strip()]
+
+    def _count_tokens(self, text: str) -> int:
+        return len(self._encoding.encode_ordinary(text))
+
+    def _split(
+        self, text: str, separators: Sequence[str], size: int | None = None
+    ) -> list[tuple[str, int]]:
+        """Return ``(segment, token_count)`` pairs each within ``max_tokens``."""
+
+        if size is None:
+            size = self._count_tokens(text)
+        if size <= self.max_tokens:
+            return [(text, size)]
+        for position, separator in enumerate(separators):
+            if separator not in text:
+                continue
+            pieces = text.split(separator)
+            # Keep the separator attached so merged chunks read naturally.
+            pieces = [piece + separator for piece in pieces[:-1]] + pieces[-1:]
+            pieces = [piece for piece in pieces if piece]
+            # Pieces are small, so a loop beats encode_ordinary_batch, which
+            # starts a thread pool on every call.
+            sizes = [len(self._encoding.encode_ordinary(piece)) for piece in pieces]
+            segments: list[tuple[str, int]] = []
+            for piece, piece_size in zip(pieces, sizes):
+                segments.extend(
+                    self._split(piece, separators[position + 1 :], piece_size)
+                )
+            return segments
+        # No separator left: cut on token boundaries.
+        tokens = self._encoding.encode_ordinary(text)
+        return [
+            (
+                self._encoding.decode(tokens[start : start + self.max_tokens]),
+                len(tokens[start : start + self.max_tokens]),
+            )
+            for start in range(0, len(tokens), self.max_tokens)
+        ]
+
+    def _merge(self, segments: list[tuple[str, int]]) -> list[tuple[str, int]]:
+        merged: list[tuple[str, int]] = []
+        for segment, size in segments:
+            if merged and merged[-1][1] + size <= self.merge_tokens:
+                previous, previous_size = merged[-1]
+                merged[-1] = (previous + segment, previous_size + size)
+            else:
+                merged.append((segment, size))
+
+        # Fold fragments too short to carry meaning into a neighbour.
+        compacted: list[tuple[str, int]] = []
+        for segment, size in merged:
+            if compacted and (size < self.min_tokens or compacted[-1][1] < self.min_tokens):
+                previous, previous_size = compacted[-1]
+                compacted[-1] = (previous + segment, previous_size + size)
+            else:
+                compacted.append((segment, size))
+        return compacted
@@ -0,0 +1,64 @@
+"""Background ingestion so uploads do not block request workers."""
+from __future__ import annotations
+
+import concurrent.futures as cf
+import logging
+from pathlib import Path
+from typing import Iterable
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .chatbot import get_engine
+from .models import Document, IngestJob
+
+
+logger = logging.getLogger(__name__)
+
+# A single worker keeps index writes ordered; chat requests are unaffected.
+INGEST_EXECUTOR = cf.ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="ragchat-ingest"
+)
+
+
+def submit_ingest(
+    paths: Iterable[Path], document_ids: Iterable[int] = ()
+) -> IngestJob:
+    """Record an ingestion job for ``paths`` and run it in the background.
+
+    ``document_ids`` are the uploaded :class:`Document` rows whose
+    ``ingested_at`` is set once the job succeeds.
+    """
+
+    job = IngestJob.objects.create()
+    INGEST_EXECUTOR.submit(
+        _run_ingest, job.pk, [str(path) for path in paths], list(document_ids)
+    )
+    logger.info("Tâche d'ingestion %s mise en file d'attente", job.pk)
+    return job
+
+
+def _run_ingest(job_id, paths: list[str], document_ids: list[int]) -> None:
+    try:
+        IngestJob.objects.filter(pk=job_id).update(status=IngestJob.Status.RUNNING)
+        try:
+            ingested = get_engine().ingest_files([Path(path) for path in paths])
+        except Exception as exc:
+            logger.exception("Échec de la tâche d'ingestion %s", job_id)
+            IngestJob.objects.filter(pk=job_id).update(
+                status=IngestJob.Status.FAILED,
+                error=str(exc),
+                finished_at=timezone.now(),
+            )
+            return
+        finished_at = timezone.now()
+        IngestJob.objects.filter(pk=job_id).update(
+            status=IngestJob.Status.SUCCEEDED,
+            ingested_sources=ingested,
+            finished_at=finished_at,
+        )
+        if document_ids:
+            Document.objects.filter(pk__in=document_ids).update(ingested_at=finished_at)
+        logger.info("Tâche d'ingestion %s terminée : %s", job_id, ingested)
+    finally:
+        close_old_connections()
@@ -0,0 +1,511 @@
+"""Tests for the RAG chatbot engine."""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import faiss
+import numpy as np
+import tiktoken
+from django.test import SimpleTestCase
+
+from .cache import EmbeddingCache, PromptCache, SemanticResponseCache
+from .chatbot import ChatbotEngine, _load_documents, _run_async
+from .indexes import IVF_MIN_VECTORS
+from .splitters import SplitThenMergeTextSplitter
+
+
+class RestartThenIngestTests(SimpleTestCase):
+    """An index reloaded memory-mapped after a restart must still accept writes."""
+
+    dimension = 64
+    kinds = ("flat", "hnsw", "ivfpq", "ivfpq_fastscan", "ivf_sq8")
+
+    def setUp(self) -> None:
+        self.workdir = Path(tempfile.mkdtemp())
+        (self.workdir / "docs").mkdir()
+        patcher = mock.patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.rng = np.random.default_rng(0)
+
+    def _engine(self, kind: str) -> ChatbotEngine:
+        return ChatbotEngine(
+            docs_path=self.workdir / "docs",
+            index_path=self.workdir / kind / "faiss_index",
+            llm_name="gpt-4o-mini",
+            index_type=kind,
+        )
+
+    def _vectors(self, count: int) -> list[list[float]]:
+        vectors = self.rng.standard_normal((count, self.dimension)).astype("float32")
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors.tolist()
+
+    def _chunks(self, prefix: str, count: int) -> tuple[list[str], list[dict]]:
+        texts = [f"{prefix} {position}" for position in range(count)]
+        return texts, [{"source": f"{prefix}.txt"} for _ in texts]
+
+    def test_ingest_after_restart(self) -> None:
+        for kind in self.kinds:
+            with self.subTest(kind=kind):
+                first = self._engine(kind)
+                texts, metadatas = self._chunks("initial", IVF_MIN_VECTORS)
+                first._set_vector_store(
+                    first._new_vector_store(
+                        texts, self._vectors(len(texts)), metadatas
+                    )
+                )
+                first._save_vector_store()
+                first._write_manifest({})
+
+                restarted = self._engine(kind)
+                added_texts, added_metadatas = self._chunks("added", 10)
+                with restarted._index_lock:
+                    restarted._ensure_writable_index()
+                    restarted._vector_store.add_embeddings(
+                        list(zip(added_texts, self._vectors(len(added_texts)))),
+                        metadatas=added_metadatas,
+                    )
+                    restarted._save_vector_store()
+
+                self.assertEqual(
+                    self._engine(kind)._vector_store.index.ntotal,
+                    IVF_MIN_VECTORS + len(added_texts),
+                )
+
+
+class ConcurrentIngestTests(SimpleTestCase):
+    """A file ingested by one worker must not be embedded again by another."""
+
+    dimension = 64
+
+    def setUp(self) -> None:
+        self.workdir = Path(tempfile.mkdtemp())
+        (self.workdir / "docs").mkdir()
+        patcher = mock.patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        rng = np.random.default_rng(0)
+
+        async def embed(engine, texts, *args, **kwargs):
+            vectors = rng.standard_normal((len(texts), self.dimension)).astype("float32")
+            return vectors.tolist()
+
+        patcher = mock.patch.object(ChatbotEngine, "_aembed_texts", embed)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _engine(self, kind: str = "flat") -> ChatbotEngine:
+        return ChatbotEngine(
+            docs_path=self.workdir / "docs",
+            index_path=self.workdir / "faiss_index",
+            llm_name="gpt-4o-mini",
+            index_type=kind,
+        )
+
+    def test_second_worker_skips_file_ingested_meanwhile(self) -> None:
+        first, second = self._engine(), self._engine()
+        upload = self.workdir / "upload.txt"
+        upload.write_text("Horaires d'ouverture du service client.", encoding="utf-8")
+
+        self.assertEqual(first.ingest_files([upload]), [str(upload)])
+        ntotal = first._vector_store.index.ntotal
+
+        self.assertEqual(second.ingest_files([upload]), [])
+        self.assertEqual(second._vector_store.index.ntotal, ntotal)
+        self.assertEqual(self._engine()._vector_store.index.ntotal, ntotal)
+
+    def test_worker_drops_index_deleted_by_another(self) -> None:
+        first = self._engine()
+        upload = self.workdir / "upload.txt"
+        upload.write_text("Horaires d'ouverture du service client.", encoding="utf-8")
+        first.ingest_files([upload])
+        second = self._engine()
+        self.assertIsNotNone(second._vector_store)
+
+        first.rebuild_index([])
+        second._reload_if_stale()
+        self.assertIsNone(second._vector_store)
+        self.assertEqual(second._manifest, {})
+
+        other = self.workdir / "other.txt"
+        other.write_text("Conditions de retour des produits.", encoding="utf-8")
+        self.assertEqual(second.ingest_files([other]), [str(other)])
+        self.assertEqual(self._engine()._indexed_sources(), {str(other)})
+
+    def test_modified_file_replaces_its_chunks_without_in_place_removal(self) -> None:
+        engine = self._engine("hnsw")
+        upload = self.workdir / "upload.txt"
+        upload.write_text("Ancienne politique de retour.", encoding="utf-8")
+        engine.ingest_files([upload])
+        upload.write_text("Nouvelle politique de retour.", encoding="utf-8")
+
+        self.assertEqual(engine.ingest_files([upload]), [str(upload)])
+        texts = [
+            engine._vector_store.docstore.search(doc_id).metadata["raw_text"]
+            for doc_id in engine._vector_store.index_to_docstore_id.values()
+        ]
+        self.assertEqual(texts, ["Nouvelle politique de retour."])
+
+
+class LoadDocumentsTests(SimpleTestCase):
+    """Missing and undecodable files are expected failures, logged without traceback."""
+
+    def setUp(self) -> None:
+        self.workdir = Path(tempfile.mkdtemp())
+
+    def assert_expected_failure(self, path: Path) -> None:
+        with self.assertLogs("ragchat.chatbot", level="WARNING") as logs:
+            self.assertEqual(_load_documents(path), [])
+        self.assertNotIn("ERROR", [record.levelname for record in logs.records])
+
+    def test_undecodable_text_file(self) -> None:
+        bad = self.workdir / "bad.txt"
+        bad.write_bytes(b"\xff\xfe\x00\xd8 invalid utf-8 \xc3\x28")
+        self.assert_expected_failure(bad)
+
+    def test_missing_files(self) -> None:
+        for name in ("missing.txt", "missing.md"):
+            with self.subTest(name=name):
+                self.assert_expected_failure(self.workdir / name)
+
+    def test_flat_stand_in_is_trained_once_large_enough(self) -> None:
+        engine = self._engine("ivf_sq8")
+        count = IVF_MIN_VECTORS - 1
+        vectors = np.random.default_rng(1).standard_normal((count, self.dimension))
+        engine._set_vector_store(
+            engine._new_vector_store(
+                [f"fragment {position}" for position in range(count)],
+                vectors.astype("float32").tolist(),
+                [{"source": "initial.txt"} for _ in range(count)],
+            )
+        )
+        engine._save_vector_store()
+        engine._write_manifest({})
+        self.assertIsInstance(faiss.downcast_index(engine._vector_store.index), faiss.IndexFlat)
+
+        upload = self.workdir / "upload.txt"
+        upload.write_text("Conditions de retour des produits.", encoding="utf-8")
+        engine.ingest_files([upload])
+
+        for index in (engine._vector_store.index, self._engine("ivf_sq8")._vector_store.index):
+            self.assertIsNotNone(faiss.try_extract_index_ivf(index))
+            self.assertEqual(index.ntotal, IVF_MIN_VECTORS)
+
+
+class SplitThenMergeTextSplitterTests(SimpleTestCase):
+    """Chunks stay within the token limits and together cover the text once."""
+
+    def setUp(self) -> None:
+        self.splitter = SplitThenMergeTextSplitter(
+            max_tokens=50, merge_tokens=60, min_tokens=10
+        )
+
+    def _tokens(self, text: str) -> int:
+        return self.splitter._count_tokens(text)
+
+    def test_chunks_respect_limits_without_overlap(self) -> None:
+        paragraphs = [
+            " ".join(f"Phrase {paragraph}.{sentence} du guide." for sentence in range(12))
+            for paragraph in range(6)
+        ]
+        text = "\n\n".join(paragraphs)
+
+        chunks = self.splitter.split_text(text)
+        sizes = [
+            size
+            for _, size in self.splitter._merge(
+                self.splitter._split(text, self.splitter.separators)
+            )
+        ]
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), text)
+        # Folding a short fragment may overshoot merge_tokens by under min_tokens.
+        for size in sizes:
+            self.assertLessEqual(size, self.splitter.merge_tokens + self.splitter.min_tokens)
+            self.assertGreaterEqual(size, self.splitter.min_tokens)
+
+    def test_oversized_piece_is_cut_on_token_boundaries(self) -> None:
+        text = "abcdefghij" * 200
+
+        segments = self.splitter._split(text, self.splitter.separators)
+
+        self.assertGreater(len(segments), 1)
+        self.assertEqual("".join(segment for segment, _ in segments), text)
+        for _, size in segments:
+            self.assertLessEqual(size, self.splitter.max_tokens)
+
+
+class BatchTextsTests(SimpleTestCase):
+    """Embedding batches respect the input-count and token limits of one request."""
+
+    def test_medium_input_is_spread_over_parallel_requests(self) -> None:
+        texts = [f"fragment {position}" for position in range(5000)]
+
+        batches = list(ChatbotEngine._batch_texts(texts))
+
+        self.assertEqual(len(batches), 8)
+        self.assertEqual([text for batch in batches for text in batch], texts)
+        self.assertTrue(all(len(batch) <= 625 for batch in batches))
+
+    def test_batches_stay_under_the_token_limit(self) -> None:
+        texts = ["mot " * 30 for _ in range(20)]
+        with mock.patch("ragchat.chatbot.EMBEDDING_BATCH_MAX_TOKENS", 100):
+            batches = list(ChatbotEngine._batch_texts(texts))
+
+        self.assertEqual([text for batch in batches for text in batch], texts)
+        encoding = tiktoken.get_encoding("cl100k_base")
+        for batch in batches:
+            self.assertLessEqual(
+                sum(len(encoding.encode_ordinary(text)) for text in batch), 100
+            )
+
+
+class PackContextTests(SimpleTestCase):
+    """The context holds whole chunks in rank order within the token budget."""
+
+    def setUp(self) -> None:
+        workdir = Path(tempfile.mkdtemp())
+        (workdir / "docs").mkdir()
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test"}):
+            self.engine = ChatbotEngine(
+                docs_path=workdir / "docs",
+                index_path=workdir / "faiss_index",
+                llm_name="gpt-4o-mini",
+            )
+        self.encoding = self.engine._prompt_encoding
+
+    def _tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def test_stops_before_the_first_chunk_over_budget(self) -> None:
+        texts = ["premier " * 20, "deuxième " * 20, "troisième " * 20]
+        budget = self._tokens(texts[0]) + self._tokens(texts[1]) + 5
+
+        self.assertEqual(self.engine._pack_context(texts, budget), "\n\n".join(texts[:2]))
+
+    def test_truncates_a_first_chunk_larger_than_the_budget(self) -> None:
+        context = self.engine._pack_context(["mot " * 200, "suivant"], 50)
+
+        self.assertLessEqual(self._tokens(context), 50)
+        self.assertTrue(("mot " * 200).startswith(context))
+
+
+class SemanticResponseCacheTests(SimpleTestCase):
+    """Answers are served for near-identical questions of the same chat mode."""
+
+    def setUp(self) -> None:
+        self.cache = SemanticResponseCache(max_entries=2, threshold=0.97)
+
+    def test_hit_requires_similarity_and_same_key(self) -> None:
+        self.cache.put("rag", [1.0, 0.0, 0.0], "réponse")
+
+        self.assertEqual(self.cache.get("rag", [0.99, 0.05, 0.0]), "réponse")
+        self.assertIsNone(self.cache.get("direct", [1.0, 0.0, 0.0]))
+        self.assertIsNone(self.cache.get("rag", [0.0, 1.0, 0.0]))
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        self.cache.put("rag", [1.0, 0.0, 0.0], "a")
+        self.cache.put("rag", [0.0, 1.0, 0.0], "b")
+        self.cache.get("rag", [1.0, 0.0, 0.0])
+        self.cache.put("rag", [0.0, 0.0, 1.0], "c")
+
+        self.assertEqual(self.cache.get("rag", [1.0, 0.0, 0.0]), "a")
+        self.assertIsNone(self.cache.get("rag", [0.0, 1.0, 0.0]))
+        self.assertEqual(self.cache.get("rag", [0.0, 0.0, 1.0]), "c")
+
+    def test_clear_drops_every_answer(self) -> None:
+        self.cache.put("rag", [1.0, 0.0, 0.0], "a")
+        self.cache.clear()
+
+        self.assertIsNone(self.cache.get("rag", [1.0, 0.0, 0.0]))
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    """The SQLite caches persist across instances and stay within their bounds."""
+
+    def setUp(self) -> None:
+        self.workdir = Path(tempfile.mkdtemp())
+
+    def test_prompt_cache_is_shared_and_keyed_by_model(self) -> None:
+        path = self.workdir / "prompt_cache.sqlite3"
+        PromptCache(path).put("gpt-4o-mini", "Bonjour ?", "Bonjour !")
+
+        cache = PromptCache(path)
+        self.assertEqual(cache.get("gpt-4o-mini", "Bonjour ?"), "Bonjour !")
+        self.assertIsNone(cache.get("gpt-4o", "Bonjour ?"))
+        self.assertIsNone(cache.get("gpt-4o-mini", "Salut ?"))
+
+    def test_prompt_cache_keeps_the_newest_entries(self) -> None:
+        cache = PromptCache(self.workdir / "prompt_cache.sqlite3", max_entries=2)
+        for position, created_at in enumerate((1.0, 2.0, 3.0)):
+            with mock.patch("ragchat.cache.time.time", return_value=created_at):
+                cache.put("gpt-4o-mini", f"question {position}", f"réponse {position}")
+
+        self.assertIsNone(cache.get("gpt-4o-mini", "question 0"))
+        self.assertEqual(cache.get("gpt-4o-mini", "question 2"), "réponse 2")
+
+    def test_embedding_cache_round_trips_vectors_per_model(self) -> None:
+        path = self.workdir / "embedding_cache.sqlite3"
+        texts = [f"fragment {position}" for position in range(EmbeddingCache._LOOKUP_BATCH + 5)]
+        vectors = [[float(position), 0.5, -1.0] for position in range(len(texts))]
+        EmbeddingCache(path, "text-embedding-ada-002").put_many(texts, vectors)
+
+        found = EmbeddingCache(path, "text-embedding-ada-002").get_many([*texts, "absent"])
+        self.assertEqual(found, dict(zip(texts, vectors)))
+        self.assertEqual(EmbeddingCache(path, "text-embedding-3-small").get_many(texts), {})
+
+    def test_embedding_cache_keeps_the_newest_entries(self) -> None:
+        cache = EmbeddingCache(
+            self.workdir / "embedding_cache.sqlite3", "text-embedding-ada-002", max_entries=2
+        )
+        for created_at, text in ((1.0, "ancien"), (2.0, "moyen"), (3.0, "récent")):
+            with mock.patch("ragchat.cache.time.time", return_value=created_at):
+                cache.put_many([text], [[created_at]])
+
+        self.assertEqual(set(cache.get_many(["ancien", "moyen", "récent"])), {"moyen", "récent"})
+
+
+class FakeBatchAPI:
+    """In-memory stand-in for the OpenAI Files and Batch endpoints.
+
+    Each input embeds as ``[len(text)]``; results come back shuffled, as the
+    real output file does not follow the request order.
+    """
+
+    def __init__(self) -> None:
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+        self.uploads: dict[str, str] = {}
+        self.jobs: dict[str, str] = {}
+        self.interrupted = False
+
+    async def _create_file(self, file, purpose):
+        file_id = f"file-{len(self.uploads)}"
+        self.uploads[file_id] = file[1].decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    async def _create_batch(self, input_file_id, endpoint, completion_window):
+        job_id = f"batch-{len(self.jobs)}"
+        self.jobs[job_id] = input_file_id
+        return self._job(job_id, "in_progress")
+
+    async def _retrieve(self, job_id):
+        if self.interrupted:
+            raise ConnectionError("processus interrompu")
+        return self._job(job_id, "completed")
+
+    @staticmethod
+    def _job(job_id: str, status: str) -> SimpleNamespace:
+        return SimpleNamespace(
+            id=job_id,
+            status=status,
+            output_file_id=f"out-{job_id}" if status == "completed" else None,
+            request_counts=None,
+        )
+
+    async def _content(self, file_id):
+        requests = self.uploads[self.jobs[file_id.removeprefix("out-")]].splitlines()
+        lines = []
+        for request in map(json.loads, reversed(requests)):
+            data = [
+                {"index": position, "embedding": [float(len(text))]}
+                for position, text in enumerate(request["body"]["input"])
+            ]
+            record = {"custom_id": request["custom_id"], "response": {"body": {"data": data[::-1]}}}
+            lines.append(json.dumps(record))
+        return SimpleNamespace(text="\n".join(lines) + "\n")
+
+
+class BatchEmbeddingTests(SimpleTestCase):
+    """Batch API builds are split under the input cap and survive a restart."""
+
+    batches = [["a", "bb"], ["ccc"], ["dddd", "eeeee"]]
+    expected = [[[1.0], [2.0]], [[3.0]], [[4.0], [5.0]]]
+
+    def setUp(self) -> None:
+        self.workdir = Path(tempfile.mkdtemp())
+        (self.workdir / "docs").mkdir()
+        patcher = mock.patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("ragchat.chatbot.EMBEDDING_BATCH_POLL_SECONDS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.api = FakeBatchAPI()
+
+    def _engine(self) -> ChatbotEngine:
+        engine = ChatbotEngine(
+            docs_path=self.workdir / "docs",
+            index_path=self.workdir / "faiss_index",
+            llm_name="gpt-4o-mini",
+        )
+        engine.__dict__["async_client"] = self.api
+        return engine
+
+    def test_results_are_matched_to_their_batches(self) -> None:
+        with mock.patch("ragchat.chatbot.EMBEDDING_BATCH_JOB_MAX_INPUTS", 3):
+            results = _run_async(self._engine()._aembed_offline(self.batches))
+
+        self.assertEqual(results, self.expected)
+        self.assertEqual(len(self.api.jobs), 2)
+
+    def test_restarted_process_resumes_submitted_jobs(self) -> None:
+        self.api.interrupted = True
+        with self.assertRaises(ConnectionError):
+            _run_async(self._engine()._aembed_offline(self.batches))
+        self.assertEqual(list(self._engine()._read_batch_jobs().values()), ["batch-0"])
+
+        self.api.interrupted = False
+        restarted = self._engine()
+        self.assertEqual(_run_async(restarted._aembed_offline(self.batches)), self.expected)
+        self.assertEqual(list(self.api.jobs), ["batch-0"])
+        self.assertEqual(restarted._read_batch_jobs(), {})
+
+
+class ChatStreamViewTests(SimpleTestCase):
+    """The SSE stream reports generation failures instead of just ending."""
+
+    def _stream(self, tokens) -> list[tuple[str, object]]:
+        engine = mock.Mock()
+        engine.chat_stream.return_value = ("Direct", [], tokens)
+        with mock.patch("ragchat.views.get_engine", return_value=engine):
+            response = self.client.post(
+                "/api/chat/stream/",
+                {"message": "Bonjour", "mode": "direct"},
+                content_type="application/json",
+            )
+            body = b"".join(response.streaming_content).decode("utf-8")
+        self.assertEqual(response.status_code, 200)
+        events = []
+        for block in filter(None, body.split("\n\n")):
+            name_line, data_line = block.split("\n")
+            events.append(
+                (
+                    name_line.removeprefix("event: "),
+                    json.loads(data_line.removeprefix("data: ")),
+                )
+            )
+        return events
+
+    def test_successful_stream_ends_with_done(self) -> None:
+        events = self._stream(iter(["Bon", "jour"]))
+
+        self.assertEqual([name for name, _ in events], ["meta", "token", "token", "done"])
+
+    def test_failure_mid_stream_emits_error_event(self) -> None:
+        def tokens():
+            yield "Bon"
+            raise RuntimeError("API OpenAI indisponible")
+
+        with self.assertLogs("ragchat.views", level="ERROR"):
+            events = self._stream(tokens())
+
+        self.assertEqual([name for name, _ in events], ["meta", "token", "error"])
+        self.assertIn("detail", events[-1][1])
@@ -4,12 +4,14 @@ from __future__ import annotations
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import ChatView, DocumentViewSet
+from .views import ChatStreamView, ChatView, DocumentViewSet, IngestJobViewSet
 
 router = DefaultRouter()
 router.register("documents", DocumentViewSet, basename="document")
+router.register("ingest-jobs", IngestJobViewSet, basename="ingest-job")
 
 urlpatterns = [
     path("chat/", ChatView.as_view(), name="chat"),
+    path("chat/stream/", ChatStreamView.as_view(), name="chat-stream"),
     path("", include(router.urls)),
 ]
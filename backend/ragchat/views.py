@@ -1,10 +1,13 @@
 """API endpoints for the RAG chatbot."""
 from __future__ import annotations
 
+import json
 import logging
 from pathlib import Path
+from typing import Iterator
 
 from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser
@@ -12,12 +15,14 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .chatbot import get_engine
-from .models import Document
+from .models import Document, IngestJob
 from .serializers import (
     ChatRequestSerializer,
     ChatResponseSerializer,
     DocumentSerializer,
+    IngestJobSerializer,
 )
+from .tasks import submit_ingest
 
 
 logger = logging.getLogger(__name__)
@@ -34,12 +39,14 @@ class DocumentViewSet(viewsets.ModelViewSet):
             "Téléversement reçu : nom=%s, taille=%s octets", uploaded_file.name, uploaded_file.size
         )
         document: Document = serializer.save(original_name=uploaded_file.name)
-        engine = get_engine()
-        ingested_sources = engine.ingest_files([Path(document.file.path)])
+        # Embedding a large PDF takes seconds; the 201 is returned as soon as
+        # the file is stored, with the job clients poll until ``ingested_at``
+        # is filled in.
+        job = submit_ingest([Path(document.file.path)], document_ids=[document.pk])
+        document.ingest_job = job
+        document.save(update_fields=["ingest_job"])
         logger.info(
-            "Ingestion terminée pour %s. Sources ingérées : %s",
-            uploaded_file.name,
-            ingested_sources,
+            "Ingestion de %s confiée à la tâche %s", uploaded_file.name, job.pk
         )
 
     def perform_destroy(self, instance: Document) -> None:  # type: ignore[override]
@@ -51,14 +58,21 @@ class DocumentViewSet(viewsets.ModelViewSet):
             instance.file.delete(save=False)
         instance.delete()
 
-        remaining_paths = [
-            Path(doc.file.path)
-            for doc in Document.objects.all()
-            if doc.file and doc.file.name
-        ]
-
         engine = get_engine()
-        engine.rebuild_index(remaining_paths)
+        if file_path is not None and engine.remove_files([file_path]):
+            logger.info("Document %s supprimé de l'index RAG", document_name)
+        else:
+            remaining_paths = [
+                Path(doc.file.path)
+                for doc in Document.objects.all()
+                if doc.file and doc.file.name
+            ]
+            engine.rebuild_index(remaining_paths)
+            logger.info(
+                "Document %s supprimé. Index RAG reconstruit à partir des %s fichiers restants",
+                document_name,
+                len(remaining_paths),
+            )
 
         if file_path and file_path.exists():
             try:
@@ -66,29 +80,29 @@ class DocumentViewSet(viewsets.ModelViewSet):
             except FileNotFoundError:
                 pass
 
-        logger.info(
-            "Document %s supprimé. Index RAG reconstruit à partir des %s fichiers restants",
-            document_name,
-            len(remaining_paths),
-        )
-
     @action(detail=False, methods=["post"], url_path="ingest")
     def ingest_existing(self, request, *args, **kwargs):
-        engine = get_engine()
         docs_dir = Path(settings.BASE_DIR) / "docs"
         if not docs_dir.exists():
             logger.warning(
                 "Demande d'ingestion de documents existants mais le dossier %s est introuvable",
                 docs_dir,
             )
-            return Response({"ingested_sources": []})
+            return Response(
+                {"detail": f"Dossier de documents introuvable : {docs_dir.name}"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
         file_paths = [path for path in docs_dir.glob("**/*") if path.is_file()]
         logger.info(
             "Ingestion manuelle déclenchée pour %s fichiers existants", len(file_paths)
         )
-        ingested = engine.ingest_files(file_paths)
-        logger.info("Ingestion existante terminée. Sources ingérées : %s", ingested)
-        return Response({"ingested_sources": ingested})
+        job = submit_ingest(file_paths)
+        return Response({"job_id": str(job.pk)}, status=status.HTTP_202_ACCEPTED)
+
+
+class IngestJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = IngestJob.objects.all()  # lets clients poll background ingestions
+    serializer_class = IngestJobSerializer
 
 
 class ChatView(APIView):
@@ -114,3 +128,51 @@ class ChatView(APIView):
             "Réponse envoyée au client. Intention=%s, documents=%s", intent, sources
         )
         return Response(response_serializer.data, status=status.HTTP_200_OK)
+
+
+class ChatStreamView(APIView):
+    """Stream the assistant answer as Server-Sent Events.
+
+    A ``meta`` event carries the intent and documents as soon as retrieval is
+    done, followed by one ``token`` event per generated chunk and a final
+    ``done`` event, or an ``error`` event when generation fails mid-stream.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = ChatRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        engine = get_engine()
+        message = serializer.validated_data["message"]
+        mode = serializer.validated_data["mode"]
+        history = serializer.validated_data.get("history", [])
+        logger.info(
+            "Requête de chat en flux reçue : %s (mode=%s, historique=%s entrées)",
+            message,
+            mode,
+            len(history),
+        )
+        intent, sources, tokens = engine.chat_stream(
+            message, mode=mode, history=history
+        )
+        response = StreamingHttpResponse(
+            self._events(intent, sources, tokens), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def _events(intent: str, sources: list[str], tokens: Iterator[str]) -> Iterator[str]:
+        meta = {"intent": intent, "used_documents": sources}
+        yield f"event: meta\ndata: {json.dumps(meta)}\n\n"
+        try:
+            for token in tokens:
+                yield f"event: token\ndata: {json.dumps(token)}\n\n"
+        except Exception:
+            # The 200 status is already sent: report the failure in the stream.
+            logger.exception("Échec de la génération de la réponse en flux")
+            error = {"detail": "La génération de la réponse a échoué."}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
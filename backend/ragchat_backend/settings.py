@@ -93,3 +93,7 @@ REST_FRAMEWORK = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+# Build the chatbot engine (FAISS index, OpenAI clients) when a server process
+# starts, e.g. with ``gunicorn --preload``. Management commands never do.
+RAGCHAT_PRELOAD_ENGINE = os.getenv("RAGCHAT_PRELOAD_ENGINE", "False") == "True"
@@ -6,6 +6,7 @@ import { Badge } from './components/ui/Badge'
 import { Switch } from './components/ui/Switch'
 import { Label } from './components/ui/Label'
 import { SparklesIcon, DatabaseIcon } from './components/icons'
+import { readServerSentEvents } from './lib/sse'
 
 const DEFAULT_API_BASE = 'http://localhost:8000/api'
 
@@ -61,6 +62,9 @@ const INITIAL_ASSISTANT_MESSAGE = {
   intent: 'System',
 }
 
+// Delay between two status checks of a background ingestion.
+const INGEST_POLL_INTERVAL_MS = 2000
+
 function createMessageId(prefix = 'msg') {
   return `${prefix}-${Date.now()}-${Math.random().toString(16).slice(2)}`
 }
@@ -81,10 +85,27 @@ function normaliseDocument(apiDocument) {
     size: Number(apiDocument.size ?? 0),
     type: apiDocument.type || extension,
     uploadedAt: apiDocument.uploaded_at ? new Date(apiDocument.uploaded_at) : new Date(),
+    ingestedAt: apiDocument.ingested_at ? new Date(apiDocument.ingested_at) : null,
+    ingestJobId: apiDocument.ingest_job ?? null,
+    ingestStatus: apiDocument.ingest_status ?? null,
     path: filePath,
   }
 }
 
+async function waitForIngestJob(apiBase, jobId) {
+  for (;;) {
+    const response = await fetch(`${apiBase}/ingest-jobs/${jobId}/`)
+    if (!response.ok) {
+      throw new Error("Suivi de l'ingestion impossible")
+    }
+    const job = await response.json()
+    if (job.status === 'succeeded' || job.status === 'failed') {
+      return job
+    }
+    await new Promise((resolve) => setTimeout(resolve, INGEST_POLL_INTERVAL_MS))
+  }
+}
+
 export default function App() {
   const [apiBase] = useState(inferApiBaseUrl)
   const [documents, setDocuments] = useState([])
@@ -155,7 +176,7 @@ export default function App() {
       const historyPayload = buildHistoryPayload([...messages, userMessage])
 
       try {
-        const response = await fetch(`${apiBase}/chat/`, {
+        const response = await fetch(`${apiBase}/chat/stream/`, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify({
@@ -165,21 +186,56 @@ export default function App() {
           }),
         })
 
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
           throw new Error('Réponse du serveur invalide')
         }
 
-        const data = await response.json()
-        const assistantMessage = {
-          id: createMessageId('assistant'),
-          content: data.response || "Je n'ai pas pu formuler de réponse.",
-          role: 'assistant',
-          timestamp: new Date(),
-          usedDocuments: Array.isArray(data.used_documents) ? data.used_documents : [],
-          intent: data.intent || 'Direct',
-        }
+        // The assistant bubble appears with the metadata and grows token by token.
+        const assistantId = createMessageId('assistant')
+        let answer = ''
+        let streamError = null
+        await readServerSentEvents(response, (event, data) => {
+          if (event === 'meta') {
+            const assistantMessage = {
+              id: assistantId,
+              content: '',
+              role: 'assistant',
+              timestamp: new Date(),
+              usedDocuments: Array.isArray(data.used_documents) ? data.used_documents : [],
+              intent: data.intent || 'Direct',
+            }
+            setMessages((previous) => [...previous, assistantMessage])
+          } else if (event === 'token') {
+            answer += data
+            const content = answer
+            setMessages((previous) =>
+              previous.map((entry) => (entry.id === assistantId ? { ...entry, content } : entry))
+            )
+          } else if (event === 'error') {
+            streamError = data.detail || 'La génération de la réponse a échoué.'
+          }
+        })
 
-        setMessages((previous) => [...previous, assistantMessage])
+        if (streamError) {
+          // Keep what was streamed so far and flag the answer as incomplete.
+          setStatusMessage(streamError)
+          const content = answer
+            ? `${answer}\n\n(Réponse interrompue : ${streamError})`
+            : `Une erreur est survenue : ${streamError}`
+          setMessages((previous) =>
+            previous.map((entry) =>
+              entry.id === assistantId ? { ...entry, content, intent: 'Error' } : entry
+            )
+          )
+        } else if (!answer) {
+          setMessages((previous) =>
+            previous.map((entry) =>
+              entry.id === assistantId
+                ? { ...entry, content: "Je n'ai pas pu formuler de réponse." }
+                : entry
+            )
+          )
+        }
       } catch (error) {
         console.error('Erreur lors de lenvoi du message', error)
         setStatusMessage("Une erreur est survenue lors de l'appel au serveur.")
@@ -207,6 +263,7 @@ export default function App() {
 
         const files = Array.from(fileList)
         const uploaded = []
+        let uploadFailed = false
 
         for (const file of files) {
           const formData = new FormData()
@@ -230,6 +287,7 @@ export default function App() {
           } catch (error) {
             console.error('Erreur de téléversement', error)
             setStatusMessage('Impossible de téléverser un des fichiers.')
+            uploadFailed = true
             break
           }
         }
@@ -237,10 +295,28 @@ export default function App() {
         if (uploaded.length > 0) {
           setDocuments((previous) => [...uploaded, ...previous])
           setRefreshKey((key) => key + 1)
-          setStatusMessage('Téléversement terminé et documents ingérés.')
+          const prefix = uploadFailed ? "Un des fichiers n'a pas été téléversé. " : ''
+          setStatusMessage(`${prefix}Téléversement terminé, ingestion des documents en cours…`)
+
+          // The server embeds the files in the background: wait for its jobs.
+          const jobIds = [...new Set(uploaded.map((doc) => doc.ingestJobId).filter(Boolean))]
+          try {
+            const jobs = await Promise.all(jobIds.map((jobId) => waitForIngestJob(apiBase, jobId)))
+            const failures = jobs.filter((job) => job.status === 'failed')
+            if (failures.length > 0) {
+              const reasons = failures.map((job) => job.error || 'erreur inconnue').join(' ; ')
+              setStatusMessage(`${prefix}Échec de l'ingestion des documents : ${reasons}`)
+            } else {
+              setStatusMessage(`${prefix}Téléversement terminé et documents ingérés.`)
+            }
+          } catch (error) {
+            console.error("Erreur de suivi de l'ingestion", error)
+            setStatusMessage(`${prefix}Impossible de suivre l'ingestion des documents.`)
+          }
+          fetchDocuments()
         }
       },
-    [apiBase]
+    [apiBase, fetchDocuments]
   )
 
   const handleDeleteDocument = useCallback(
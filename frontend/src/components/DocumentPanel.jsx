@@ -24,6 +24,13 @@ function formatFileSize(bytes) {
   return `${Math.round(size * 100) / 100} ${units[unitIndex]}`
 }
 
+function formatIngestStatus(doc) {
+  if (doc.ingestedAt) return null
+  if (doc.ingestStatus === 'pending' || doc.ingestStatus === 'running') return 'Ingestion en cours'
+  if (doc.ingestStatus === 'failed') return "Échec de l'ingestion"
+  return null
+}
+
 function getFileIcon(type = '') {
   const normalised = type.toLowerCase()
   if (normalised.includes('pdf') || normalised.includes('doc')) return FileTextIcon
@@ -89,6 +96,7 @@ export function DocumentPanel({ documents, isRagEnabled, onUpload, onDelete }) {
         ) : (
           documents.map((doc) => {
             const Icon = getFileIcon(doc.type || doc.name)
+            const ingestStatus = formatIngestStatus(doc)
             return (
               <Card key={doc.id} className="document-card">
                 <div className="document-icon">
@@ -106,6 +114,12 @@ export function DocumentPanel({ documents, isRagEnabled, onUpload, onDelete }) {
                         ? new Date(doc.uploadedAt).toLocaleDateString('fr-FR')
                         : 'Date inconnue'}
                     </span>
+                    {ingestStatus && (
+                      <>
+                        <span>•</span>
+                        <span>{ingestStatus}</span>
+                      </>
+                    )}
                   </div>
                 </div>
                 <Button
@@ -0,0 +1,39 @@
+// Reads a text/event-stream response body and calls onEvent(name, data)
+// for every complete event, with data already JSON-decoded.
+export async function readServerSentEvents(response, onEvent) {
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  const flush = (block) => {
+    let name = 'message'
+    const dataLines = []
+    for (const line of block.split('\n')) {
+      if (line.startsWith('event:')) {
+        name = line.slice(6).trim()
+      } else if (line.startsWith('data:')) {
+        dataLines.push(line.slice(5).trimStart())
+      }
+    }
+    if (dataLines.length > 0) {
+      onEvent(name, JSON.parse(dataLines.join('\n')))
+    }
+  }
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) {
+      break
+    }
+    buffer += decoder.decode(value, { stream: true })
+    let separator = buffer.indexOf('\n\n')
+    while (separator !== -1) {
+      flush(buffer.slice(0, separator))
+      buffer = buffer.slice(separator + 2)
+      separator = buffer.indexOf('\n\n')
+    }
+  }
+  if (buffer.trim()) {
+    flush(buffer)
+  }
+}
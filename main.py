@@ -1,27 +1,52 @@
 """Simple CLI entry point for the RAG chatbot engine."""
 from __future__ import annotations
 
-from backend.ragchat.chatbot import get_engine
+import asyncio
+from typing import AsyncIterator, Iterator
+
+from backend.ragchat.chatbot import MAX_HISTORY_ENTRIES, get_engine
 from dotenv import load_dotenv
-load_dotenv()  
+load_dotenv()
+
+
+async def _iterate(tokens: Iterator[str]) -> AsyncIterator[str]:
+    """Pull tokens from a blocking stream without blocking the event loop."""
+
+    done = object()
+    while (token := await asyncio.to_thread(next, tokens, done)) is not done:
+        yield token
 
 
-def main() -> None:
-    engine = get_engine()
+async def main() -> None:
+    # Load the FAISS index while the user types the first question.
+    engine_task = asyncio.create_task(asyncio.to_thread(get_engine))
     print("RAG Chatbot CLI prêt. Tapez 'quit' pour sortir.")
+    # Session memory, trimmed to what the engine puts in the prompt anyway.
+    history: list[dict[str, str]] = []
     while True:
-        user_input = input("Vous: ")
+        user_input = await asyncio.to_thread(input, "Vous: ")
         if user_input.lower().strip() in {"quit", "exit", "q"}:
             print("À bientôt !")
             break
-        answer, intent, sources = engine.chat(user_input)
+        engine = await engine_task
+        intent, sources, tokens = await asyncio.to_thread(
+            engine.chat_stream, user_input, history=history
+        )
         print(f"Intent détecté: {intent}")
         if sources:
             print("Documents utilisés:")
             for source in sources:
                 print(f" - {source}")
-        print(f"Assistant: {answer}\n")
+        print("Assistant: ", end="", flush=True)
+        parts: list[str] = []
+        async for token in _iterate(tokens):
+            parts.append(token)
+            print(token, end="", flush=True)
+        print("\n")
+        history.append({"role": "user", "content": user_input})
+        history.append({"role": "assistant", "content": "".join(parts)})
+        del history[:-MAX_HISTORY_ENTRIES]
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())